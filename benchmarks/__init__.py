@@ -0,0 +1 @@
+"""Бенчмарки TTDM. Запуск: python -m benchmarks.<имя_модуля>"""
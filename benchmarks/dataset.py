@@ -0,0 +1,72 @@
+"""Детерминированный генератор наборов задач для бенчмарков (от тысяч до десятков миллионов задач).
+
+Названия и описания смешивают кириллицу и латиницу, категории распределены неравномерно (закон Ципфа:
+несколько крупных категорий и длинный хвост мелких), сроки - в прошлом, в будущем или не заданы, приоритеты
+и статусы смещены в сторону низких и невыполненных. Один и тот же seed дает один и тот же набор.
+
+Запуск: python -m benchmarks.dataset tasks.json --size 1000000 [--seed 0]"""
+import json
+import random
+import argparse
+from itertools import accumulate
+from typing import Iterator
+from datetime import datetime, timedelta
+
+WORDS = (
+    "отчёт", "встреча", "проект", "релиз", "бюджет", "договор", "презентация", "звонок", "ремонт", "покупки",
+    "тесты", "документация", "сервер", "клиент", "план", "анализ", "дизайн", "обучение", "врач", "спорт",
+    "report", "meeting", "deploy", "review", "budget", "invoice", "backlog", "sprint", "bug", "release",
+    "database", "migration", "design", "research", "email", "call", "docs", "refactor", "backup", "travel",
+)
+CATEGORIES = (
+    "работа", "дом", "project", "учёба", "здоровье", "finance", "покупки", "hobby", "семья", "travel",
+    "спорт", "reading", "дача", "car", "документы", "pets", "ремонт", "music", "друзья", "misc",
+)
+CATEGORY_WEIGHTS = tuple(accumulate(1 / rank for rank in range(1, len(CATEGORIES) + 1))) # Закон Ципфа (s = 1)
+PRIORITIES = ("низкий", "средний", "высокий")
+PRIORITY_WEIGHTS = (0.6, 0.85, 1.0)
+TODAY = datetime(2025, 1, 1)
+
+def generate_tasks(size: int, seed: int = 0, first_id: int = 1) -> Iterator[dict]:
+    """Поток словарей задач в формате Task.to_dict (ID подряд, начиная с first_id)."""
+    rng = random.Random(seed)
+    choices = rng.choices
+    for task_id in range(first_id, first_id + size):
+        title = " ".join(choices(WORDS, k=rng.randint(1, 4))).capitalize()
+        roll = rng.random()
+        if roll < 0.3:
+            deadline = None
+        else: # Примерно треть сроков уже прошла
+            deadline = (TODAY + timedelta(days=rng.randint(-120, 240), hours=rng.choice((0, 9, 18)))).isoformat()
+        yield {
+            "task_id": task_id,
+            "title": f"{title} #{task_id}",
+            "description": " ".join(choices(WORDS, k=rng.randint(3, 12))) if rng.random() < 0.6 else None,
+            "category": choices(CATEGORIES, cum_weights=CATEGORY_WEIGHTS)[0] if rng.random() < 0.9 else None,
+            "deadline": deadline,
+            "priority": choices(PRIORITIES, cum_weights=PRIORITY_WEIGHTS)[0],
+            "completed": rng.random() < 0.35,
+        }
+
+def write_json(filename: str, size: int, seed: int = 0, chunk: int = 10_000):
+    """Запись набора в tasks.json. Файл пишется порциями, поэтому весь набор в памяти не держится."""
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write("[")
+        batch = []
+        for i, data in enumerate(generate_tasks(size, seed)):
+            batch.append(encode(data))
+            if len(batch) == chunk:
+                file.write(("," if i >= chunk else "") + ",".join(batch))
+                batch = []
+        if batch:
+            file.write(("," if size > len(batch) else "") + ",".join(batch))
+        file.write("]")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("filename")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_json(args.filename, args.size, args.seed)
@@ -0,0 +1,94 @@
+"""Задержка get_task/delete_task в TaskRepository: линейный поиск по списку (как было) против индекса по task_id.
+
+Запуск: python -m benchmarks.repository_index [--sizes 10000,100000,1000000] [--ops 200]"""
+import random
+import argparse
+from time import perf_counter
+
+from src.model import Task
+from src.repository import TaskRepository
+from src.utils import NoResultFound
+
+class MemoryStorage:
+    """Хранилище-заглушка без диска, чтобы измерять только операции в памяти."""
+    needs_ops = False
+
+    def __init__(self, tasks: list[Task]):
+        self._tasks = tasks
+
+    def load(self) -> list[Task]:
+        return self._tasks
+
+    def save(self, tasks):
+        pass
+
+    def record(self, op, payload, tasks):
+        pass
+
+    def record_batch(self, ops, tasks):
+        pass
+
+    def version(self):
+        return None
+
+    def changes_since(self, version):
+        return None
+
+    def open_snapshot(self):
+        return None
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class LinearTaskRepository:
+    """Прежняя реализация get_task/delete_task: два линейных прохода по списку."""
+    def __init__(self, tasks: list[Task]):
+        self.tasks = list(tasks)
+
+    def get_task(self, task_id: int) -> Task:
+        for task in self.tasks:
+            if task.task_id == task_id:
+                return task
+        raise NoResultFound(task_id)
+
+    def delete_task(self, task_id: int) -> bool:
+        for task in self.tasks:
+            if task.task_id == task_id:
+                self.tasks.remove(task)
+                return True
+        return False
+
+def make_tasks(size: int) -> list[Task]:
+    return [Task(task_id, f"task {task_id}", None, None, None) for task_id in range(size)]
+
+def measure(operation, ids: list[int]) -> float:
+    """Средняя задержка операции в микросекундах."""
+    start = perf_counter()
+    for task_id in ids:
+        operation(task_id)
+    return (perf_counter() - start) / len(ids) * 1e6
+
+def run(sizes: list[int], ops: int, seed: int = 0):
+    rng = random.Random(seed)
+    print(f"{'N':>10} | {'реализация':<10} | {'get, мкс':>12} | {'delete, мкс':>12}")
+    for size in sizes:
+        tasks = make_tasks(size)
+        ids = rng.sample(range(size), ops)
+
+        for name, repository in (
+            ("список", LinearTaskRepository(tasks)),
+            ("индекс", TaskRepository(None, storage=MemoryStorage(tasks))),
+        ):
+            get_us = measure(repository.get_task, ids)
+            delete_us = measure(repository.delete_task, ids)
+            print(f"{size:>10} | {name:<10} | {get_us:>12.2f} | {delete_us:>12.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(",")], args.ops)
@@ -0,0 +1,109 @@
+"""Нагрузочный тест HTTP-сервиса TTDM (src.server) на локальной машине.
+
+Сервис запускается отдельным процессом над свежим набором из benchmarks.dataset, затем --clients клиентов
+с keep-alive соединениями в течение --duration секунд шлют запросы: доля --writes - изменения (добавление, смена статуса,
+редактирование), остальное - чтения (поиск по ключевому слову, просмотр категории, задача по ID). Выводятся пропускная
+способность (запросов в секунду) и задержки p50/p99 по видам запросов, а также число пакетов записи на стороне сервиса.
+
+Запуск: python -m benchmarks.service_load [--size 10000] [--clients 50] [--duration 10] [--writes 0.2] [--backend json|journal|sqlite]"""
+import os
+import sys
+import random
+import asyncio
+import argparse
+import tempfile
+from time import perf_counter
+from typing import Optional
+from urllib.parse import urlencode
+
+from src.migrate import migrate
+from src.server import call
+from benchmarks.dataset import WORDS, CATEGORIES, write_json
+from benchmarks.suite import percentiles
+
+async def start_service(filename: str, backend: str) -> tuple[asyncio.subprocess.Process, int]:
+    process = await asyncio.create_subprocess_exec(sys.executable, "-m", "src.server", filename, "--port", "0", "--backend", backend,
+                                                   stdout=asyncio.subprocess.PIPE)
+    line = (await process.stdout.readline()).decode("utf-8")
+    if "слушает" not in line:
+        process.kill()
+        raise RuntimeError(f"Сервис не запустился: {line!r}")
+    return process, int(line.rsplit(":", 1)[1])
+
+async def client(port: int, size: int, args, rng: random.Random, deadline: float, samples: dict):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    while perf_counter() < deadline:
+        if rng.random() < args.writes:
+            kind = rng.choice(("add", "status", "edit"))
+            if kind == "add":
+                request = ("POST", "/tasks", {"title": f"{rng.choice(WORDS)} нагрузка", "category": rng.choice(CATEGORIES)})
+            elif kind == "status":
+                request = ("PUT", f"/tasks/{rng.randint(1, size)}/status", {"completed": rng.random() < 0.5})
+            else:
+                request = ("PATCH", f"/tasks/{rng.randint(1, size)}", {"title": f"{rng.choice(WORDS)} изменена"})
+        else:
+            kind = rng.choice(("search", "category", "get"))
+            if kind == "search":
+                request = ("GET", "/tasks?" + urlencode({"keyword": rng.choice(WORDS), "limit": 20}), None)
+            elif kind == "category":
+                request = ("GET", "/tasks?" + urlencode({"category": rng.choice(CATEGORIES), "completed": "false", "limit": 50}), None)
+            else:
+                request = ("GET", f"/tasks/{rng.randint(1, size)}", None)
+        start = perf_counter()
+        status, _ = await call(reader, writer, *request)
+        samples.setdefault(kind, []).append(perf_counter() - start)
+        if status >= 500:
+            raise RuntimeError(f"Ошибка сервиса на {request[:2]}: {status}")
+    writer.close()
+    await writer.wait_closed()
+
+async def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "tasks.json")
+        write_json(filename, args.size, args.seed)
+        if args.backend == "sqlite":
+            migrate(filename, os.path.join(directory, "tasks.db"), target_backend="sqlite")
+            filename = os.path.join(directory, "tasks.db")
+        process, port = await start_service(filename, args.backend)
+        try:
+            samples: dict[str, list[float]] = {}
+            started = perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(client(port, args.size, args, random.Random(args.seed + i), deadline, samples)
+                                   for i in range(args.clients)))
+            elapsed = perf_counter() - started
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            _, stats = await call(reader, writer, "GET", "/stats")
+            writer.close()
+        finally:
+            process.terminate()
+            await process.wait()
+
+    total = sum(len(values) for values in samples.values())
+    return {"requests": total, "rps": total / elapsed, "all": percentiles([value for values in samples.values() for value in values]),
+            "operations": {kind: percentiles(values) for kind, values in sorted(samples.items())},
+            "batches": stats["batches"], "writes": stats["writes"]}
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10_000, help="задач в исходном наборе")
+    parser.add_argument("--clients", type=int, default=50, help="одновременных соединений")
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд нагрузки")
+    parser.add_argument("--writes", type=float, default=0.2, help="доля изменяющих запросов")
+    parser.add_argument("--backend", choices=("json", "journal", "sqlite"), default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(f"Запросов: {report['requests']}, {report['rps']:.0f} в секунду; p50 {report['all']['p50_ms']:.2f} мс,"
+          f" p99 {report['all']['p99_ms']:.2f} мс")
+    for kind, timing in report["operations"].items():
+        print(f"{kind:<9} | n={timing['n']:>7} | p50 {timing['p50_ms']:>8.2f} мс | p99 {timing['p99_ms']:>8.2f} мс")
+    if report["writes"]:
+        print(f"Изменений: {report['writes']} в {report['batches']} пакетах записи"
+              f" (в среднем {report['writes'] / report['batches']:.1f} на пакет)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Время запуска: сколько проходит до показа меню TaskCLI и до полной загрузки задач.
+
+Сравниваются прежняя загрузка (json.load + fromisoformat для каждой задачи), синхронная загрузка TaskManager
+и конструктор TaskCLI с фоновой загрузкой. Запуск: python -m benchmarks.startup [--sizes 10000,100000,1000000]"""
+import os
+import json
+import random
+import argparse
+import tempfile
+from time import perf_counter
+from datetime import datetime, timedelta
+
+from src.model import Task
+from src.services import TaskManager, IndexedTaskSearcher
+from src.presentation import TaskCLI
+
+def write_tasks(filename: str, size: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    with open(filename, "w", encoding="utf-8") as file:
+        json.dump([{
+            "task_id": task_id,
+            "title": f"Задача {task_id}",
+            "description": "описание" if rng.random() < 0.5 else None,
+            "category": rng.choice(["работа", "личное", "project"]),
+            "deadline": (start + timedelta(days=rng.randrange(365))).isoformat() if rng.random() < 0.7 else None,
+            "priority": rng.choice(["низкий", "средний", "высокий"]),
+            "completed": rng.random() < 0.5,
+        } for task_id in range(size)], file, ensure_ascii=False)
+
+def legacy_load(filename: str) -> list[Task]:
+    """Прежний TaskRepository.load_tasks."""
+    tasks = []
+    with open(filename, "r", encoding="utf-8") as file:
+        for data in json.load(file):
+            data["deadline"] = datetime.fromisoformat(data["deadline"]) if data["deadline"] else None
+            tasks.append(Task(**data))
+    return tasks
+
+def timed(action) -> tuple[float, object]:
+    start = perf_counter()
+    result = action()
+    return perf_counter() - start, result
+
+def run(sizes: list[int]):
+    print(f"{'N':>10} | {'прежняя загрузка, с':>20} | {'TaskManager, с':>15} | {'меню TaskCLI, с':>16} | {'TaskCLI загружен, с':>20}")
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory) # TaskCLI открывает tasks.json в текущем каталоге
+        for size in sizes:
+            write_tasks("tasks.json", size)
+
+            legacy, _ = timed(lambda: legacy_load("tasks.json"))
+            eager, _ = timed(lambda: TaskManager("tasks.json", IndexedTaskSearcher()))
+
+            start = perf_counter()
+            cli = TaskCLI()
+            menu = perf_counter() - start
+            cli.manager.repository.wait_loaded()
+            loaded = perf_counter() - start
+
+            print(f"{size:>10} | {legacy:>20.3f} | {eager:>15.3f} | {menu:>16.4f} | {loaded:>20.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    run([int(size) for size in parser.parse_args().sizes.split(",")])
@@ -0,0 +1,188 @@
+"""Сводный бенчмарк TTDM: операции слоев репозитория и сервиса на наборах из benchmarks.dataset.
+
+Для каждого размера набора и хранилища (json, journal, sqlite, binary) измеряются load, save, add, get (в слое сервиса -
+status, смена статуса), edit, delete, category (просмотр по категории), search (поиск по ключевому слову, слой сервиса)
+и filter (отбор по категории и статусу, слой репозитория): задержка одного вызова в перцентилях
+(p50/p90/p99/max, мс) и пиковая память загрузки (tracemalloc). Каждая операция повторяется до --ops раз, но не дольше
+--budget секунд (минимум 3 вызова), чтобы медленные операции больших наборов не растягивали прогон.
+
+Результаты пишутся в JSON (--output); с --baseline они сравниваются с сохраненным прогоном, и при росте p50
+больше чем на --tolerance (и больше чем на NOISE_MS) скрипт завершается с кодом 1.
+
+Запуск: python -m benchmarks.suite [--sizes 1000,10000,100000] [--backends json,journal,sqlite,binary] [--layers repository,service]
+                                   [--output results.json] [--baseline baseline.json] [--tolerance 0.25]"""
+import io
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from statistics import mean, quantiles
+from time import perf_counter
+from typing import Callable, Optional
+
+from src.model import Task
+from src.migrate import migrate
+from src.repository import open_repository
+from src.services import TaskManager, IndexedTaskSearcher
+from benchmarks.dataset import WORDS, CATEGORIES, write_json
+
+NOISE_MS = 0.05 # Изменения p50 меньше этого порога - шум таймера, а не регрессия
+
+def percentiles(samples: list[float]) -> dict:
+    """Сводка задержек в миллисекундах."""
+    ms = sorted(sample * 1000 for sample in samples)
+    cuts = quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {"n": len(ms), "mean_ms": mean(ms), "p50_ms": cuts[49], "p90_ms": cuts[89], "p99_ms": cuts[98], "max_ms": ms[-1]}
+
+def measure(operation: Callable[[int], object], ops: int, budget: float) -> dict:
+    """Повторение operation(i) до ops раз или до исчерпания budget секунд (но не меньше 3 раз)."""
+    samples, started = [], perf_counter()
+    for i in range(ops):
+        start = perf_counter()
+        operation(i)
+        samples.append(perf_counter() - start)
+        if i >= 2 and perf_counter() - started > budget:
+            break
+    return percentiles(samples)
+
+def peak_memory(action: Callable[[], object]) -> float:
+    """Пиковый объем памяти Python (МБ) во время action; объект-результат удерживается до замера."""
+    tracemalloc.start()
+    try:
+        result = action()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak / 2**20
+
+def prepare(source: str, directory: str, backend: str) -> str:
+    """Свежая копия набора в формате хранилища (операции меняют файл)."""
+    if backend in ("sqlite", "binary"):
+        target = os.path.join(directory, "tasks.db" if backend == "sqlite" else "tasks.ttdb")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(target + suffix):
+                os.remove(target + suffix)
+        migrate(source, target, target_backend=backend)
+        return target
+    target = os.path.join(directory, f"tasks.{backend}")
+    shutil.copy(source, target) # Снимок журнального хранилища - тот же JSON-массив
+    if os.path.exists(f"{target}.journal"):
+        os.remove(f"{target}.journal")
+    return target
+
+def bench_repository(filename: str, backend: str, size: int, args, rng: random.Random) -> dict:
+    results = {"load": measure(lambda i: open_repository(filename, backend=backend).close(), args.repeat, args.budget)}
+    repository = open_repository(filename, backend=backend)
+    ids = rng.sample(range(1, size + 1), min(size, args.ops))
+    new_id = size + 1
+
+    results["save"] = measure(lambda i: repository.save_tasks(), args.repeat, args.budget)
+    results["add"] = measure(lambda i: repository.add_task(Task(new_id + i, f"Новая задача {i}", None, "работа", None)),
+                             args.ops, args.budget)
+    results["get"] = measure(lambda i: repository.get_task(ids[i % len(ids)]), args.ops, args.budget)
+    results["edit"] = measure(lambda i: repository.update_task(ids[i % len(ids)], title=f"Изменена {i}"), args.ops, args.budget)
+    results["category"] = measure(lambda i: repository.get_tasks_by_category(rng.choice(CATEGORIES)), args.ops, args.budget)
+    results["filter"] = measure(lambda i: repository.filter_tasks(category=rng.choice(CATEGORIES), completed=False),
+                                args.ops, args.budget)
+    results["delete"] = measure(lambda i: repository.delete_task(ids[i % len(ids)]), args.ops, args.budget)
+    repository.close()
+    return results
+
+def bench_service(filename: str, backend: str, size: int, args, rng: random.Random) -> dict:
+    def load(i):
+        TaskManager(filename, IndexedTaskSearcher(), backend=backend, cache_size=0).close()
+
+    results = {"load": measure(load, args.repeat, args.budget)}
+    manager = TaskManager(filename, IndexedTaskSearcher(), backend=backend, cache_size=0) # Без кэша: измеряется сам поиск
+    ids = rng.sample(range(1, size + 1), min(size, args.ops))
+
+    results["save"] = measure(lambda i: manager.repository.save_tasks(), args.repeat, args.budget)
+    with redirect_stdout(io.StringIO()): # add_task и change_status печатают сообщения для CLI
+        results["add"] = measure(lambda i: manager.add_task(f"Новая задача {i}", category="работа"), args.ops, args.budget)
+        results["status"] = measure(lambda i: manager.change_status(ids[i % len(ids)], bool(i % 2)), args.ops, args.budget)
+    results["edit"] = measure(lambda i: manager.edit_task(ids[i % len(ids)], title=f"Изменена {i}"), args.ops, args.budget)
+    results["category"] = measure(lambda i: manager.view_tasks_by_category(rng.choice(CATEGORIES)), args.ops, args.budget)
+    results["search"] = measure(lambda i: manager.search(keyword=rng.choice(WORDS)), args.ops, args.budget)
+    results["delete"] = measure(lambda i: manager.delete_task(ids[i % len(ids)]), args.ops, args.budget)
+    manager.close()
+    return results
+
+LAYERS = {"repository": bench_repository, "service": bench_service}
+
+def run(args) -> dict:
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": args.seed,
+                 "ops": args.ops, "budget": args.budget},
+        "results": [],
+        "memory": [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            source = os.path.join(directory, "dataset.json")
+            write_json(source, size, args.seed)
+            for backend in args.backends:
+                filename = prepare(source, directory, backend)
+                report["memory"].append({"size": size, "backend": backend,
+                                         "load_peak_mb": peak_memory(lambda: open_repository(filename, backend=backend))})
+                for layer in args.layers:
+                    filename = prepare(source, directory, backend)
+                    timings = LAYERS[layer](filename, backend, size, args, random.Random(args.seed))
+                    for operation, timing in timings.items():
+                        entry = {"layer": layer, "backend": backend, "size": size, "operation": operation, **timing}
+                        report["results"].append(entry)
+                        print(f"{size:>9} | {backend:<8} | {layer:<10} | {operation:<8} | p50 {entry['p50_ms']:>10.3f} мс"
+                              f" | p99 {entry['p99_ms']:>10.3f} мс | n={entry['n']}", flush=True)
+    return report
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Сравнение p50 с базовым прогоном. Возвращает описания регрессий."""
+    key = lambda entry: (entry["layer"], entry["backend"], entry["size"], entry["operation"])
+    previous = {key(entry): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in report["results"]:
+        old = previous.get(key(entry))
+        if old is None or old["p50_ms"] <= 0:
+            continue
+        ratio = entry["p50_ms"] / old["p50_ms"]
+        if ratio > 1 + tolerance and entry["p50_ms"] - old["p50_ms"] > NOISE_MS:
+            regressions.append(f"{'/'.join(map(str, key(entry)))}: p50 {old['p50_ms']:.3f} -> {entry['p50_ms']:.3f} мс (x{ratio:.2f})")
+    return regressions
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", type=lambda value: [int(size) for size in value.split(",")])
+    parser.add_argument("--backends", default="json,journal,sqlite,binary", type=lambda value: value.split(","))
+    parser.add_argument("--layers", default="repository,service", type=lambda value: value.split(","))
+    parser.add_argument("--ops", type=int, default=200, help="наибольшее число вызовов каждой операции")
+    parser.add_argument("--repeat", type=int, default=5, help="наибольшее число повторов load и save")
+    parser.add_argument("--budget", type=float, default=2.0, help="секунд на одну операцию")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--baseline", help="сохраненные результаты для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимый относительный рост p50")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    for entry in report["memory"]:
+        print(f"{entry['size']:>9} | {entry['backend']:<8} | пиковая память загрузки {entry['load_peak_mb']:.1f} МБ")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Память на одну задачу (tracemalloc): прежний Task с __dict__ против Task со __slots__ и колоночного TaskColumns.
+
+Запуск: python -m benchmarks.task_memory [--size 1000000]"""
+import gc
+import json
+import random
+import argparse
+import tracemalloc
+
+from src.model import Task
+from src.columnar import TaskColumns
+
+CATEGORIES = ["работа", "личное", "учеба", "project", "дом"]
+PRIORITIES = ["низкий", "средний", "высокий"]
+
+class LegacyTask:
+    """Прежняя модель: обычный класс с __dict__, строки категории и приоритета у каждой задачи свои."""
+    def __init__(self, task_id, title, description, category, deadline, priority="низкий", completed=False):
+        self.task_id = task_id
+        self.title = title
+        self.description = description
+        self.category = category
+        self.deadline = deadline
+        self.priority = priority
+        self.completed = completed
+
+def make_payload(size: int, seed: int = 0) -> str:
+    """JSON в формате tasks.json: при разборе каждая запись получает собственные объекты строк, как при загрузке файла."""
+    rng = random.Random(seed)
+    return json.dumps([{
+        "task_id": task_id,
+        "title": f"Задача {task_id}",
+        "description": None,
+        "category": rng.choice(CATEGORIES),
+        "deadline": None,
+        "priority": rng.choice(PRIORITIES),
+        "completed": rng.random() < 0.5,
+    } for task_id in range(size)], ensure_ascii=False)
+
+def measure(build, payload: str, size: int) -> float:
+    """Байт на задачу, удерживаемых после загрузки (сами разобранные словари уже освобождены)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(json.loads(payload))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / size
+
+def run(size: int):
+    payload = make_payload(size)
+    builds = {
+        "Task (__dict__)": lambda records: [LegacyTask(**data) for data in records],
+        "Task (__slots__)": lambda records: [Task(**data) for data in records],
+        "TaskColumns": lambda records: TaskColumns.from_tasks(Task(**data) for data in records),
+    }
+    print(f"{'модель':<18} | {'байт на задачу':>14}")
+    for name, build in builds.items():
+        print(f"{name:<18} | {measure(build, payload, size):>14.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    run(parser.parse_args().size)
@@ -0,0 +1,77 @@
+"""Пропускная способность импорта и экспорта (src.transfer) в зависимости от числа процессов разбора.
+
+Набор из benchmarks.dataset пишется в JSON Lines (или CSV), затем для каждого значения --workers измеряются отдельно
+стадия разбора и проверки в пуле (записей в секунду, без вставки) и полный импорт в пустое хранилище одним пакетом.
+Стадия разбора масштабируется по ядрам, а вставка в репозиторий выполняется в одном процессе, поэтому полный импорт
+ускоряется, пока разбор остается его основной частью. В конце измеряется экспорт.
+
+Запуск: python -m benchmarks.transfer [--size 1000000] [--workers 1,2,4,8] [--format jsonl|csv] [--backend json|journal|sqlite]"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+from time import perf_counter
+from typing import Optional
+
+from src.repository import open_repository
+from src.transfer import FIELDS, import_tasks, export_tasks, parse_chunk, parse_parallel, read_chunks
+from benchmarks.dataset import generate_tasks
+
+def write_dump(filename: str, format: str, size: int, seed: int):
+    """Запись набора в JSON Lines или CSV потоком."""
+    import csv
+    with open(filename, "w", encoding="utf-8", newline="") as file:
+        if format == "csv":
+            writer = csv.writer(file, lineterminator="\n")
+            writer.writerow(FIELDS)
+            writer.writerows(("" if value is None else value for value in data.values()) for data in generate_tasks(size, seed))
+        else:
+            encode = json.JSONEncoder(ensure_ascii=False).encode
+            file.writelines(encode(data) + "\n" for data in generate_tasks(size, seed))
+
+def parse_only(filename: str, format: str, workers: int, chunk_size: int) -> int:
+    chunks = read_chunks(filename, format, chunk_size)
+    if workers == 1:
+        return sum(len(records) for records, _, _ in map(parse_chunk, chunks))
+    return sum(len(records) for records, _, _ in parse_parallel(chunks, workers))
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)),
+                        type=lambda value: [int(n) for n in value.split(",")])
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--backend", choices=("json", "journal", "sqlite"), default="json")
+    parser.add_argument("--chunk", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        dump = os.path.join(directory, f"dump.{args.format}")
+        write_dump(dump, args.format, args.size, args.seed)
+        print(f"Набор: {args.size} записей, {os.path.getsize(dump) / 2**20:.1f} МБ ({args.format}), ядер: {os.cpu_count()}")
+
+        baseline = None
+        for workers in args.workers:
+            start = perf_counter()
+            parsed = parse_only(dump, args.format, workers, args.chunk)
+            parse_rate = parsed / (perf_counter() - start)
+            baseline = baseline or parse_rate
+
+            target = os.path.join(directory, f"tasks{workers}.db" if args.backend == "sqlite" else f"tasks{workers}.json")
+            repository = open_repository(target, backend=args.backend)
+            start = perf_counter()
+            report = import_tasks(repository, dump, args.format, workers, args.chunk)
+            import_rate = report["imported"] / (perf_counter() - start)
+            print(f"процессов {workers:>3} | разбор {parse_rate:>10.0f} зап/с (x{parse_rate / baseline:.2f})"
+                  f" | импорт {import_rate:>10.0f} зап/с")
+
+        start = perf_counter()
+        count = export_tasks(repository.tasks, os.path.join(directory, f"export.{args.format}"))
+        print(f"экспорт {count / (perf_counter() - start):.0f} зап/с")
+        repository.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
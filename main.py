@@ -1,5 +1,17 @@
+import os
+import argparse
+
 from src.presentation import TaskCLI
+from src.repository import BACKENDS
+from src.instrumentation import profiled, PROFILE_ENV
 
 if __name__ == "__main__":
-    cli_app = TaskCLI()
-    cli_app.run()
+    parser = argparse.ArgumentParser(description="TTDM - консольный менеджер задач.")
+    parser.add_argument("filename", nargs="?", default="tasks.json", help="файл хранилища (по умолчанию tasks.json)")
+    parser.add_argument("--backend", choices=BACKENDS, help="тип хранилища (по умолчанию - по расширению файла)")
+    parser.add_argument("--shared", action="store_true", help="файл открыт и в других процессах")
+    args = parser.parse_args()
+
+    with profiled(os.environ.get(PROFILE_ENV)): # TTDM_PROFILE=<файл> - профиль cProfile всей сессии
+        cli_app = TaskCLI(args.filename, shared=args.shared, backend=args.backend)
+        cli_app.run()
@@ -0,0 +1,222 @@
+import os
+import json
+import mmap
+import struct
+import operator
+from array import array
+from itertools import compress
+from typing import Iterable, Iterator, Optional, Union
+from datetime import datetime, timedelta, timezone
+
+from .model import Task, Priority
+from .storage import JsonStorage, atomic_open
+from .indexes import fold
+from .instrumentation import instrumented, timed
+
+MAGIC = b"TTDMSNAP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQQ") # сигнатура, версия формата, число задач, смещение таблицы категорий, смещение кучи строк
+EPOCH = datetime(1970, 1, 1)
+NO_DEADLINE = -(1 << 63)
+NONE = -1
+
+# Столбцы таблицы записей в порядке расположения в файле: (имя, код типа array). Запись i - i-е значение каждого столбца.
+# Столбцы с 8-байтными значениями идут первыми, поэтому все столбцы выровнены по своему размеру.
+COLUMNS = (
+    ("task_ids", "q"),
+    ("deadlines", "q"), # Микросекунды от 1970-01-01 (срок без часового пояса), NO_DEADLINE - срока нет
+    ("title_offsets", "q"), # Смещения строк в куче, в байтах
+    ("description_offsets", "q"), # NONE - описания нет
+    ("title_lengths", "i"),
+    ("description_lengths", "i"),
+    ("category_codes", "i"), # Номер в таблице категорий, NONE - категории нет
+    ("priorities", "B"),
+    ("completed", "B"),
+)
+
+def deadline_micros(deadline: Optional[datetime]) -> int:
+    if deadline is None:
+        return NO_DEADLINE
+    if deadline.tzinfo is not None: # Сроки с часовым поясом хранятся в UTC
+        deadline = deadline.astimezone(timezone.utc).replace(tzinfo=None)
+    return (deadline - EPOCH) // timedelta(microseconds=1)
+
+def write_snapshot(filename: str, tasks: Iterable[Task]):
+    """Запись задач в двоичный снимок (атомарная замена файла).
+
+    Формат: заголовок HEADER, таблица записей фиксированной ширины по столбцам (COLUMNS), таблица категорий (JSON-список)
+    и куча строк UTF-8 с названиями и описаниями. Категории хранятся кодами, поэтому фильтр по категории сравнивает числа."""
+    columns = {name: array(code) for name, code in COLUMNS}
+    categories: dict[str, int] = {}
+    heap = bytearray()
+
+    for task in tasks:
+        title = task.title.encode("utf-8")
+        columns["task_ids"].append(task.task_id)
+        columns["deadlines"].append(deadline_micros(task.deadline))
+        columns["title_offsets"].append(len(heap))
+        columns["title_lengths"].append(len(title))
+        heap += title
+        if task.description is None:
+            columns["description_offsets"].append(NONE)
+            columns["description_lengths"].append(0)
+        else:
+            description = task.description.encode("utf-8")
+            columns["description_offsets"].append(len(heap))
+            columns["description_lengths"].append(len(description))
+            heap += description
+        columns["category_codes"].append(NONE if task.category is None else categories.setdefault(task.category, len(categories)))
+        columns["priorities"].append(task.priority_level)
+        columns["completed"].append(bool(task.completed))
+
+    count = len(columns["task_ids"])
+    table = b"".join(columns[name].tobytes() for name, _ in COLUMNS)
+    category_table = json.dumps(list(categories), ensure_ascii=False).encode("utf-8")
+    categories_offset = HEADER.size + len(table)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, count, categories_offset, categories_offset + len(category_table))
+
+    with atomic_open(filename, binary=True) as file:
+        file.write(header)
+        file.write(table)
+        file.write(category_table)
+        file.write(heap)
+
+class BinarySnapshot:
+    """Двоичный снимок задач, открытый через mmap.
+
+    Открытие читает только заголовок и таблицу категорий: столбцы - это представления memoryview прямо на отображенный файл,
+    без копирования, а поля задачи декодируются только при обращении к ней. Фильтры по категории и статусу проходят
+    по упакованным столбцам (map/compress на уровне C), не создавая объекты Task."""
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else None
+        self._view = memoryview(self._mmap if self._mmap is not None else b"")
+        if len(self._view) < HEADER.size:
+            raise ValueError(f"Файл {filename} не является снимком задач.")
+        magic, version, self.count, categories_offset, self._heap_offset = HEADER.unpack_from(self._view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Файл {filename} не является снимком задач (или записан другой версией формата).")
+
+        offset = HEADER.size
+        for name, code in COLUMNS:
+            size = array(code).itemsize * self.count
+            setattr(self, name, self._view[offset:offset + size].cast(code))
+            offset += size
+        self.categories: list[str] = json.loads(bytes(self._view[categories_offset:self._heap_offset]).decode("utf-8"))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        """Освобождение отображения. Представления столбцов после этого использовать нельзя."""
+        for name, _ in COLUMNS:
+            getattr(self, name).release()
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self) -> "BinarySnapshot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _text(self, offset: int, length: int) -> str:
+        start = self._heap_offset + offset
+        return str(self._view[start:start + length], "utf-8")
+
+    def title(self, i: int) -> str:
+        return self._text(self.title_offsets[i], self.title_lengths[i])
+
+    def task(self, i: int) -> Task:
+        """Задача i-й записи (поля декодируются сейчас)."""
+        description_offset = self.description_offsets[i]
+        category_code = self.category_codes[i]
+        deadline = self.deadlines[i]
+        return Task(
+            self.task_ids[i],
+            self.title(i),
+            None if description_offset == NONE else self._text(description_offset, self.description_lengths[i]),
+            None if category_code == NONE else self.categories[category_code],
+            None if deadline == NO_DEADLINE else EPOCH + timedelta(microseconds=deadline),
+            Priority(self.priorities[i]),
+            bool(self.completed[i]),
+        )
+
+    def __iter__(self) -> Iterator[Task]:
+        """Все задачи по порядку записей. Столбцы перебираются параллельно, а куча строк копируется один раз,
+        а не по срезу на каждое поле."""
+        heap = self._view[self._heap_offset:].tobytes()
+        categories = self.categories + [None] # Код NONE (-1) указывает на последний элемент - None
+        priorities = tuple(Priority)
+        for task_id, deadline, title_offset, description_offset, title_length, description_length, category_code, priority, completed \
+                in zip(*(getattr(self, name) for name, _ in COLUMNS)):
+            yield Task(
+                task_id,
+                heap[title_offset:title_offset + title_length].decode("utf-8"),
+                None if description_offset == NONE else heap[description_offset:description_offset + description_length].decode("utf-8"),
+                categories[category_code],
+                None if deadline == NO_DEADLINE else EPOCH + timedelta(microseconds=deadline),
+                priorities[priority],
+                completed == 1,
+            )
+
+    def _mask(self, category: Optional[str], completed: Optional[bool], priority: Union[Priority, str, None],
+              due_before: Optional[datetime]) -> Optional[Iterable]:
+        """Маска записей по условиям (см. filter): None - условий нет, пустой список - ни одна запись не подходит."""
+        masks = []
+        if category:
+            key = fold(category)
+            codes = {code for code, name in enumerate(self.categories) if fold(name) == key}
+            if not codes:
+                return []
+            masks.append(map(codes.__contains__, self.category_codes))
+        if completed is not None:
+            masks.append(self.completed if completed else map(operator.not_, self.completed))
+        if priority is not None:
+            masks.append(map(int(Priority.parse(priority)).__eq__, self.priorities))
+        if due_before is not None: # NO_DEADLINE меньше любого срока, поэтому задачи без срока отсеиваются отдельно
+            masks.append(map(operator.and_, map(deadline_micros(due_before).__gt__, self.deadlines), map(NO_DEADLINE.__ne__, self.deadlines)))
+
+        if not masks:
+            return None
+        mask = masks[0]
+        for other in masks[1:]:
+            mask = map(operator.and_, mask, other)
+        return mask
+
+    def filter(self, category: Optional[str] = None, completed: Optional[bool] = None,
+               priority: Union[Priority, str, None] = None, due_before: Optional[datetime] = None) -> list[int]:
+        """ID задач с категорией category (без учета регистра), статусом completed, приоритетом priority
+        и сроком раньше due_before, в порядке записей снимка (как TaskColumns.filter)."""
+        mask = self._mask(category, completed, priority, due_before)
+        return self.task_ids.tolist() if mask is None else list(compress(self.task_ids, mask))
+
+    def records(self, category: Optional[str] = None, completed: Optional[bool] = None,
+                priority: Union[Priority, str, None] = None, due_before: Optional[datetime] = None) -> list[int]:
+        """Номера записей, удовлетворяющих условиям filter."""
+        mask = self._mask(category, completed, priority, due_before)
+        return list(range(self.count)) if mask is None else list(compress(range(self.count), mask))
+
+@instrumented
+class BinaryStorage(JsonStorage):
+    """Хранилище в двоичном снимке (см. write_snapshot и BinarySnapshot) вместо JSON-текста.
+    Как и JSON-файл, снимок перезаписывается целиком при каждом изменении, но без разбора и форматирования текста.
+    TaskRepository открывает снимок через open_snapshot и декодирует задачи только по мере надобности."""
+    @timed
+    def load(self) -> Iterator[Task]:
+        """Загрузка всех задач из снимка (чтение через mmap, декодирование сразу)."""
+        if not os.path.exists(self.filename):
+            return iter(())
+        with BinarySnapshot(self.filename) as snapshot:
+            return iter(list(snapshot))
+
+    def open_snapshot(self) -> Optional[BinarySnapshot]:
+        """Открытый снимок для отложенного декодирования (None - файла нет). Закрывает его вызывающий."""
+        return BinarySnapshot(self.filename) if os.path.exists(self.filename) else None
+
+    @timed
+    def save(self, tasks: Iterable[Task]):
+        """Сохранение всех задач в двоичный снимок (атомарная замена файла)."""
+        write_snapshot(self.filename, tasks)
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+class ResultCache:
+    """LRU-кэш результатов поиска: нормализованный ключ запроса (Query.key) -> список ID найденных задач.
+
+    Все записи относятся к одной ревизии репозитория (счетчику изменений). Запрос с другой ревизией очищает кэш,
+    поэтому после любого изменения задач устаревший результат выдан не будет. Счетчики hits/misses показывают,
+    насколько кэш полезен."""
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, list[int]] = OrderedDict()
+        self._revision = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check(self, revision):
+        if revision != self._revision:
+            self._entries.clear()
+            self._revision = revision
+
+    def get(self, key: Hashable, revision) -> Optional[list[int]]:
+        """ID задач из кэша или None (промах)."""
+        self._check(revision)
+        task_ids = self._entries.get(key)
+        if task_ids is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return task_ids
+
+    def put(self, key: Hashable, revision, task_ids: list[int]):
+        """Сохранение результата, вычисленного для ревизии revision. Самая давно использованная запись вытесняется."""
+        self._check(revision)
+        self._entries[key] = task_ids
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self._revision = None
+
+    def stats(self) -> dict:
+        """Счетчики попаданий и промахов и текущий размер кэша."""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,72 @@
+import operator
+from array import array
+from itertools import compress
+from typing import Iterable, Optional, Union
+from datetime import datetime
+
+from .model import Task, Priority
+from .indexes import fold
+
+NO_CATEGORY = -1
+NO_DEADLINE = float("nan") # Любое сравнение с NaN ложно, поэтому задачи без срока не попадают в фильтр по сроку
+
+class TaskColumns:
+    """Колоночное представление задач: параллельные массивы по полям.
+    Фильтры проходят по массивам на уровне C (map/compress), не трогая объекты Task."""
+    def __init__(self):
+        self.task_ids = array("q")
+        self.completed = bytearray()
+        self.priorities = bytearray()
+        self.category_codes = array("l")
+        self.deadlines = array("d")
+        self.categories: list[str] = [] # Словарь категорий: код -> категория без учета регистра
+        self._category_codes: dict[str, int] = {}
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Task]) -> "TaskColumns":
+        columns = cls()
+        for task in tasks:
+            columns.append(task)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def append(self, task: Task):
+        self.task_ids.append(task.task_id)
+        self.completed.append(bool(task.completed))
+        self.priorities.append(task.priority_level)
+        self.category_codes.append(self._category_code(task.category) if task.category else NO_CATEGORY)
+        self.deadlines.append(task.deadline.timestamp() if task.deadline else NO_DEADLINE)
+
+    def _category_code(self, category: str) -> int:
+        key = fold(category)
+        code = self._category_codes.get(key)
+        if code is None:
+            code = self._category_codes[key] = len(self.categories)
+            self.categories.append(key)
+        return code
+
+    def filter(self, category: Optional[str] = None, completed: Optional[bool] = None,
+               priority: Union[Priority, str, None] = None, due_before: Optional[datetime] = None) -> list[int]:
+        """ID задач, удовлетворяющих всем заданным условиям, в порядке добавления."""
+        masks = []
+        if category:
+            code = self._category_codes.get(fold(category))
+            if code is None:
+                return []
+            masks.append(map(code.__eq__, self.category_codes))
+        if completed is not None:
+            masks.append(map(int(bool(completed)).__eq__, self.completed))
+        if priority is not None:
+            masks.append(map(int(Priority.parse(priority)).__eq__, self.priorities))
+        if due_before is not None:
+            masks.append(map(due_before.timestamp().__gt__, self.deadlines))
+
+        if not masks:
+            return list(self.task_ids)
+
+        mask = masks[0]
+        for other in masks[1:]:
+            mask = map(operator.and_, mask, other)
+        return list(compress(self.task_ids, mask))
@@ -0,0 +1,39 @@
+import os
+import threading
+from typing import Callable, Optional
+
+NODE_BITS = 10 # Младшие биты ID - номер узла (процесса), остальные - порядковый номер
+NODE_MASK = (1 << NODE_BITS) - 1
+
+class TaskIdAllocator:
+    """Выдача ID задач без хеширования: ID = (порядковый номер << NODE_BITS) | номер узла.
+
+    Номер узла у каждого процесса свой (по умолчанию младшие биты PID), поэтому процессы, работающие с одним хранилищем,
+    не выдают одинаковых ID. Порядковый номер продолжает максимальный уже существующий ID, так что новые ID
+    больше всех старых (в том числе 32-битных ID из прежних tasks.json) и растут монотонно.
+    Каждый ID дополнительно проверяется на занятость через exists. Выдача потокобезопасна."""
+    def __init__(self, max_task_id: Callable[[], int], exists: Callable[[int], bool], node: Optional[int] = None):
+        self.node = (os.getpid() if node is None else node) & NODE_MASK
+        self._max_task_id = max_task_id
+        self._exists = exists
+        self._sequence: Optional[int] = None # Определяется при первой выдаче, чтобы не ждать загрузки хранилища заранее
+        self._lock = threading.Lock()
+
+    def _next(self) -> int:
+        if self._sequence is None:
+            self._sequence = self._max_task_id() >> NODE_BITS
+        while True:
+            self._sequence += 1
+            task_id = (self._sequence << NODE_BITS) | self.node
+            if not self._exists(task_id):
+                return task_id
+
+    def allocate(self) -> int:
+        """Новый свободный ID."""
+        with self._lock:
+            return self._next()
+
+    def allocate_many(self, count: int) -> list[int]:
+        """Несколько новых свободных ID (блокировка берется один раз на весь набор)."""
+        with self._lock:
+            return [self._next() for _ in range(count)]
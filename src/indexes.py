@@ -0,0 +1,155 @@
+from bisect import bisect_left, insort
+from typing import Iterable, Optional
+from datetime import datetime
+
+from .model import Task
+
+NGRAM_SIZE = 3
+
+def fold(value: str) -> str:
+    """Приведение строки к ключу для сравнения без учета регистра (как в TaskSearcher)."""
+    return value.lower()
+
+def ngrams(text: str) -> set[str]:
+    """Все подстроки длины NGRAM_SIZE (триграммы) текста."""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+class CategoryIndex:
+    """Вторичный индекс: категория без учета регистра -> множество ID задач."""
+    fields = frozenset({"category"})
+
+    def __init__(self):
+        self._ids: dict[str, set[int]] = {}
+
+    def rebuild(self, tasks: Iterable[Task]):
+        self._ids = {}
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task: Task):
+        if task.category:
+            self._ids.setdefault(fold(task.category), set()).add(task.task_id)
+
+    def discard(self, task: Task):
+        if not task.category:
+            return
+        key = fold(task.category)
+        bucket = self._ids.get(key)
+        if bucket is not None:
+            bucket.discard(task.task_id)
+            if not bucket:
+                del self._ids[key]
+
+    def lookup(self, category: str) -> set[int]:
+        return self._ids.get(fold(category), set())
+
+class StatusIndex:
+    """Вторичный индекс по статусу: множества ID выполненных и невыполненных задач."""
+    fields = frozenset({"completed"})
+
+    def __init__(self):
+        self._ids: dict[bool, set[int]] = {True: set(), False: set()}
+
+    def rebuild(self, tasks: Iterable[Task]):
+        self._ids = {True: set(), False: set()}
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task: Task):
+        self._ids[bool(task.completed)].add(task.task_id)
+
+    def discard(self, task: Task):
+        self._ids[bool(task.completed)].discard(task.task_id)
+
+    def lookup(self, completed: bool) -> set[int]:
+        return self._ids[bool(completed)]
+
+class DeadlineIndex:
+    """Вторичный индекс по сроку сдачи: отсортированный список пар (deadline, task_id).
+    Задачи без срока в индекс не попадают. Индекс строится при первом запросе,
+    чтобы загрузка не разбирала сроки всех задач заранее."""
+    fields = frozenset({"deadline"})
+
+    def __init__(self):
+        self._keys: Optional[list[tuple[datetime, int]]] = None
+        self._tasks: Iterable[Task] = ()
+
+    def rebuild(self, tasks: Iterable[Task]):
+        self._keys = None
+        self._tasks = tasks # Живое представление задач репозитория, по нему индекс строится при первом запросе
+
+    def add(self, task: Task):
+        if self._keys is not None and task.deadline:
+            insort(self._keys, (task.deadline, task.task_id))
+
+    def discard(self, task: Task):
+        if self._keys is None or not task.deadline:
+            return
+        key = (task.deadline, task.task_id)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def due_before(self, deadline: datetime) -> list[int]:
+        """ID задач со сроком строго раньше deadline, по возрастанию срока."""
+        if self._keys is None:
+            self._keys = sorted((task.deadline, task.task_id) for task in self._tasks if task.deadline)
+        end = bisect_left(self._keys, (deadline,))
+        return [task_id for _, task_id in self._keys[:end]]
+
+class TextIndex:
+    """Полнотекстовый индекс по названию и описанию задач.
+
+    Хранит приведенные к нижнему регистру тексты и словарь триграмма -> ID задач.
+    Поиск подстроки пересекает списки триграмм ключевого слова и проверяет кандидатов по сохраненным текстам,
+    поэтому семантика совпадает с TaskSearcher.search (keyword in title/description без учета регистра)."""
+    fields = frozenset({"title", "description"})
+
+    def __init__(self):
+        self._texts: dict[int, tuple[str, ...]] = {}
+        self._ngrams: dict[str, set[int]] = {}
+
+    def rebuild(self, tasks: Iterable[Task]):
+        self._texts, self._ngrams = {}, {}
+        for task in tasks:
+            self.add(task)
+
+    @staticmethod
+    def _terms(texts: tuple[str, ...]) -> set[str]:
+        grams = set()
+        for text in texts:
+            grams |= ngrams(text)
+        return grams
+
+    def add(self, task: Task):
+        texts = tuple(fold(text) for text in (task.title, task.description) if text)
+        self._texts[task.task_id] = texts
+
+        for gram in self._terms(texts):
+            self._ngrams.setdefault(gram, set()).add(task.task_id)
+
+    def discard(self, task: Task):
+        texts = self._texts.pop(task.task_id, None)
+        if texts is None:
+            return
+
+        for gram in self._terms(texts):
+            bucket = self._ngrams[gram]
+            bucket.discard(task.task_id)
+            if not bucket:
+                del self._ngrams[gram]
+
+    @staticmethod
+    def _intersect(postings: dict[str, set[int]], terms: set[str]) -> set[int]:
+        buckets = sorted((postings.get(term, set()) for term in terms), key=len)
+        return buckets[0].intersection(*buckets[1:]) if buckets else set()
+
+    def search(self, keyword: str) -> set[int]:
+        """ID задач, в названии или описании которых есть подстрока keyword (без учета регистра)."""
+        keyword = fold(keyword)
+        if len(keyword) < NGRAM_SIZE:
+            candidates = self._texts.keys() # Слишком короткий запрос для триграмм: проверяем все тексты
+        else:
+            candidates = self._intersect(self._ngrams, ngrams(keyword))
+
+        return {task_id for task_id in candidates if any(keyword in text for text in self._texts[task_id])}
@@ -0,0 +1,131 @@
+"""Встроенная инструментация: время операций репозитория, хранилища и сервиса, счетчики и профилирование cProfile.
+
+Методы помечаются декоратором @timed, а классы регистрируются декоратором @instrumented. Пока сбор выключен,
+помеченные методы остаются исходными функциями (никаких оберток), а счетчики стоят одной проверки STATS.enabled,
+поэтому выключенная инструментация почти ничего не стоит. enable() подменяет помеченные методы замеряющими
+обертками, disable() возвращает исходные.
+
+Переменные окружения: TTDM_STATS=1 - включить сбор при запуске CLI (таблица печатается при выходе),
+TTDM_PROFILE=<файл> - записать профиль cProfile всей сессии (просмотр: python -m pstats <файл>)."""
+import os
+import cProfile
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Iterator, Optional
+
+STATS_ENV = "TTDM_STATS"
+PROFILE_ENV = "TTDM_PROFILE"
+
+class Stats:
+    """Накопленная статистика: время по операциям и значения счетчиков (например, просмотренные задачи и записанные байты)."""
+    def __init__(self):
+        self.enabled = False
+        self.timings: dict[str, list] = {} # операция -> [вызовов, суммарное время, наибольшее время]
+        self.counters: dict[str, list] = {} # счетчик -> [событий, сумма]
+        self._lock = threading.Lock() # Счетчики обновляет и поток-писатель хранилища
+
+    def record(self, name: str, elapsed: float):
+        with self._lock:
+            entry = self.timings.get(name)
+            if entry is None:
+                entry = self.timings[name] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+    def count(self, name: str, amount: int):
+        """Событие счетчика. Вызывающий код проверяет STATS.enabled сам, чтобы не платить за вызов при выключенном сборе."""
+        with self._lock:
+            entry = self.counters.get(name)
+            if entry is None:
+                entry = self.counters[name] = [0, 0]
+            entry[0] += 1
+            entry[1] += amount
+
+    def reset(self):
+        with self._lock:
+            self.timings.clear()
+            self.counters.clear()
+
+    def table(self) -> str:
+        """Таблица статистики: операции по убыванию суммарного времени, затем счетчики."""
+        lines = [f"{'Операция':<42} | {'вызовов':>8} | {'всего, мс':>11} | {'среднее, мс':>11} | {'макс, мс':>10}"]
+        for name, (calls, total, longest) in sorted(self.timings.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<42} | {calls:>8} | {total * 1000:>11.3f} | {total / calls * 1000:>11.3f} | {longest * 1000:>10.3f}")
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'Счетчик':<42} | {'событий':>8} | {'сумма':>11} | {'среднее':>11}")
+            for name, (events, total) in sorted(self.counters.items()):
+                lines.append(f"{name:<42} | {events:>8} | {total:>11} | {total / events:>11.1f}")
+        if len(lines) == 1:
+            lines.append("(нет данных)")
+        return "\n".join(lines)
+
+STATS = Stats()
+_classes: list[type] = [] # Классы с методами, помеченными @timed
+_originals: list[tuple[type, str, Callable]] = [] # Подмененные методы (для disable)
+
+def timed(method: Callable) -> Callable:
+    """Пометка метода для замера времени. Сам метод не меняется: обертка появляется только после enable()."""
+    method.__timed__ = True
+    return method
+
+def instrumented(cls: type) -> type:
+    """Регистрация класса, методы которого помечены @timed."""
+    _classes.append(cls)
+    if STATS.enabled:
+        _wrap_class(cls)
+    return cls
+
+def _wrap(name: str, method: Callable) -> Callable:
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            STATS.record(name, perf_counter() - start)
+    return wrapper
+
+def _wrap_class(cls: type):
+    for attr, method in list(vars(cls).items()):
+        if callable(method) and getattr(method, "__timed__", False):
+            _originals.append((cls, attr, method))
+            setattr(cls, attr, _wrap(f"{cls.__name__}.{attr}", method))
+
+def enable():
+    """Включение сбора статистики: помеченные методы зарегистрированных классов заменяются замеряющими обертками."""
+    if STATS.enabled:
+        return
+    STATS.enabled = True
+    for cls in _classes:
+        _wrap_class(cls)
+
+def disable():
+    """Выключение сбора: возврат исходных методов. Накопленная статистика сохраняется до STATS.reset()."""
+    STATS.enabled = False
+    while _originals:
+        cls, attr, method = _originals.pop()
+        setattr(cls, attr, method)
+
+def enabled_from_env() -> bool:
+    """Включение сбора, если задана переменная окружения TTDM_STATS."""
+    if os.environ.get(STATS_ENV):
+        enable()
+    return STATS.enabled
+
+@contextmanager
+def profiled(filename: Optional[str]) -> Iterator[Optional[cProfile.Profile]]:
+    """Профилирование блока cProfile с записью результата в filename (None - без профилирования)."""
+    if not filename:
+        yield None
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(filename)
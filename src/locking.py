@@ -0,0 +1,41 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError: # Windows: рекомендательных блокировок fcntl нет
+    fcntl = None
+
+class FileLock:
+    """Рекомендательная блокировка файла (fcntl.flock) для согласования нескольких процессов.
+
+    Блокируется отдельный файл <имя>.lock, а не сами данные: файл данных заменяется атомарным переименованием,
+    и блокировка на нем потерялась бы вместе со старым inode. Повторный вход из того же потока не блокирует
+    (внутренняя блокировка уже удерживается), потоки одного процесса выстраиваются в очередь."""
+    def __init__(self, filename: str):
+        if fcntl is None:
+            raise RuntimeError("Совместный доступ нескольких процессов требует модуля fcntl (POSIX).")
+        self.filename = f"{filename}.lock"
+        self._fd = None
+        self._depth = 0
+        self._thread_lock = threading.RLock()
+
+    @contextmanager
+    def hold(self, shared: bool = False) -> Iterator[None]:
+        """Захват блокировки: shared=True - для чтения (LOCK_SH), иначе эксклюзивно (LOCK_EX).
+        При повторном входе действует режим внешнего захвата."""
+        with self._thread_lock:
+            if self._depth == 0:
+                self._fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                    os.close(self._fd)
+                    self._fd = None
@@ -0,0 +1,45 @@
+"""Перенос задач между хранилищами.
+
+Запуск: python -m src.migrate tasks.json tasks.db [--source-backend json] [--target-backend sqlite]
+Формат определяется по расширению файла (.db/.sqlite/.sqlite3 - SQLite, .ttdb - двоичный снимок, иначе JSON)
+или явно через --*-backend."""
+import argparse
+from typing import Optional
+
+from .repository import open_repository, detect_backend, BACKENDS
+from .sqlite_repository import SqliteTaskRepository
+from .storage import JsonStorage, JournalStorage
+from .binary import write_snapshot
+
+def migrate(source: str, target: str, source_backend: Optional[str] = None, target_backend: Optional[str] = None) -> int:
+    """Копирование всех задач из source в target (одной записью/транзакцией). Возвращает число перенесенных задач."""
+    tasks = open_repository(source, backend=source_backend).tasks
+
+    if target_backend is None:
+        target_backend = detect_backend(target)
+
+    if target_backend == "sqlite":
+        repository = SqliteTaskRepository(target)
+        repository.add_tasks(tasks)
+        repository.close()
+    elif target_backend == "journal":
+        JournalStorage(target).save(tasks)
+    elif target_backend == "json":
+        JsonStorage(target).save(tasks)
+    elif target_backend == "binary":
+        write_snapshot(target, tasks)
+    else:
+        raise ValueError(f"Неизвестный тип хранилища: {target_backend}.")
+
+    return len(tasks)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Перенос задач между хранилищами TTDM.")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--source-backend", choices=BACKENDS)
+    parser.add_argument("--target-backend", choices=BACKENDS)
+    args = parser.parse_args()
+
+    count = migrate(args.source, args.target, args.source_backend, args.target_backend)
+    print(f"Перенесено задач: {count}.")
@@ -1,9 +1,55 @@
-from typing import Optional
+import sys
+from enum import IntEnum
+from typing import Optional, Union
 from datetime import datetime
 
+from .utils import ValidationError
+
+class Priority(IntEnum):
+    """Приоритет задачи. Хранится как небольшое целое, наружу отдается строкой (label)."""
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
+
+    @property
+    def label(self) -> str:
+        return PRIORITY_LABELS[self]
+
+    @classmethod
+    def parse(cls, value: Union["Priority", int, str]) -> "Priority":
+        """Приведение строки ("низкий"/"средний"/"высокий", без учета регистра) или числа к Priority. Вызывает ValidationError."""
+        if type(value) is cls:
+            return value
+        if isinstance(value, str):
+            priority = PRIORITY_BY_LABEL.get(value)
+            if priority is None:
+                priority = PRIORITY_BY_LABEL.get(value.strip().lower())
+            if priority is None:
+                raise ValidationError(f"Неизвестный приоритет: {value}. Допустимые значения: {', '.join(PRIORITY_LABELS)}.")
+            return priority
+        return cls(value)
+
+    @classmethod
+    def coerce(cls, value) -> "Priority":
+        """Приведение приоритета из файла без ошибок. Раньше приоритет не проверялся, поэтому в старых хранилищах
+        встречаются произвольные строки: английские названия сохраняют смысл, остальное становится LOW (по умолчанию)."""
+        try:
+            return cls.parse(value)
+        except (ValidationError, TypeError, ValueError):
+            if isinstance(value, str):
+                return PRIORITY_ALIASES.get(value.strip().lower(), cls.LOW)
+            return cls.LOW
+
+PRIORITY_LABELS = ("низкий", "средний", "высокий")
+PRIORITY_BY_LABEL = {label: Priority(level) for level, label in enumerate(PRIORITY_LABELS)}
+PRIORITY_ALIASES = {"low": Priority.LOW, "medium": Priority.MEDIUM, "high": Priority.HIGH}
+
 class Task:
-    """Класс задач. Аналог моделей для БД, слой данных."""
-    def __init__(self, task_id: int, title: str, description: Optional[str], category: Optional[str], deadline: Optional[datetime], priority: str = "низкий", completed: bool = False):
+    """Класс задач. Аналог моделей для БД, слой данных.
+    Использует __slots__ (без __dict__ у каждого экземпляра), категория интернируется, приоритет хранится как Priority."""
+    __slots__ = ("task_id", "title", "description", "_category", "_deadline", "_priority", "completed", "__weakref__")
+
+    def __init__(self, task_id: int, title: str, description: Optional[str], category: Optional[str], deadline: Union[datetime, str, None], priority: str = "низкий", completed: bool = False):
         self.task_id = task_id
         self.title = title
         self.description = description
@@ -12,14 +58,64 @@ class Task:
         self.priority = priority
         self.completed = completed
 
+    @property
+    def category(self) -> Optional[str]:
+        return self._category
+
+    @category.setter
+    def category(self, value: Optional[str]):
+        # У множества задач одна и та же категория: храним одну копию строки на все задачи
+        self._category = sys.intern(value) if isinstance(value, str) else value
+
+    @property
+    def deadline(self) -> Optional[datetime]:
+        # Срок может прийти из файла строкой ISO: разбираем ее только при первом обращении
+        deadline = self._deadline
+        if isinstance(deadline, str):
+            deadline = self._deadline = datetime.fromisoformat(deadline)
+        return deadline
+
+    @deadline.setter
+    def deadline(self, value: Union[datetime, str, None]):
+        self._deadline = value or None
+
+    @property
+    def priority(self) -> str:
+        return PRIORITY_LABELS[self._priority]
+
+    @priority.setter
+    def priority(self, value: Union[Priority, int, str]):
+        self._priority = Priority.parse(value)
+
+    @property
+    def priority_level(self) -> Priority:
+        """Приоритет в виде Priority (удобно для сортировки и сравнения)."""
+        return self._priority
+
     def to_dict(self) -> dict:
         """Преобразование задачи в словарь для сохранения в JSON."""
+        deadline = self._deadline
         return {
             "task_id": self.task_id,
             "title": self.title,
             "description": self.description,
             "category": self.category,
-            "deadline": self.deadline.isoformat() if self.deadline else None,
+            "deadline": deadline.isoformat() if isinstance(deadline, datetime) else deadline,
             "priority": self.priority,
             "completed": self.completed
         }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Task":
+        """Создание задачи из словаря, полученного из JSON (обратное преобразование к to_dict).
+        Срок сдачи остается строкой до первого обращения к deadline. Неизвестный приоритет не мешает загрузке (см. Priority.coerce)."""
+        priority = data.get("priority")
+        if not isinstance(priority, str) or priority not in PRIORITY_BY_LABEL:
+            data = {**data, "priority": Priority.coerce(priority)}
+        return cls(**data)
+
+TASK_ORDERINGS = {
+    "priority": lambda task: -task.priority_level, # Сначала высокий приоритет
+    "deadline": lambda task: (task.deadline is None, task.deadline or datetime.min), # Задачи без срока в конце
+    "status": lambda task: task.completed, # Сначала невыполненные
+}
@@ -1,15 +1,23 @@
+from typing import Optional
 from datetime import datetime
 
-from .services import TaskSearcher, TaskManager
-from .utils import NoResultFound, InputValidator, ValidationError
+from .services import IndexedTaskSearcher, TaskManager
+from .rendering import TaskPager
+from .utils import NoResultFound, DuplicateTaskError, InputValidator, ValidationError, StaleDataError
+from . import instrumentation
 
 class TaskCLI:
     """Класс для взаимодействия пользователя и программы через командную строку. Слой представления (Presentation layer)."""
-    def __init__(self):
-        filename = "tasks.json"
-        searcher = TaskSearcher()
+    def __init__(self, filename: str = "tasks.json", shared: bool = False, backend: Optional[str] = None):
+        """filename - файл хранилища; .db/.sqlite/.sqlite3 открываются как SQLite, .ttdb - как двоичный снимок, остальные как JSON.
+        backend задает тип хранилища явно (например, "journal"). shared=True - файл открыт и в других процессах."""
+        searcher = IndexedTaskSearcher()
         
-        self.manager = TaskManager(filename, searcher)
+        # Меню показывается, пока задачи догружаются в фоне; сохранение JSON тоже выполняется в фоне и не блокирует ввод
+        # (кроме режима shared: там запись идет сразу под блокировкой файла). Журнал дописывает изменение сразу
+        self.manager = TaskManager(filename, searcher, background_load=True, background_save=True, shared=shared,
+                                   backend=backend)
+        instrumentation.enabled_from_env()
 
     def get_non_empty_input(self, prompt: str, field_name: str):
         """Метод для обеспечения ввода данных поля {field_name} пользователем."""
@@ -31,11 +39,17 @@ class TaskCLI:
             return
         
         print(f"\nЗадачи в категории {category}:")
-        for task in tasks:
-            data = f"ID: {task.task_id} | Название: {task.title} | Статус: {"Выполнена" if task.completed else "Не выполнена"}\n"\
-                    f"Приоритет: {task.priority} | Срок сдачи: {task.deadline.isoformat() if task.deadline else "Нет срока"}\n"\
-                    f"Описание: {task.description if task.description else "Нет описания"}\n"
-            print(data)
+        TaskPager.for_list(tasks, details=True).run()
+
+    def show_stats(self):
+        """Таблица времени операций и счетчиков. Если сбор выключен, он включается с этого момента."""
+        if not instrumentation.STATS.enabled:
+            instrumentation.enable()
+            print(f"Сбор статистики включен (при запуске его включает переменная {instrumentation.STATS_ENV}=1).")
+            return
+        print(instrumentation.STATS.table())
+        if self.manager.cache is not None:
+            print(f"Кэш результатов: {self.manager.cache_stats()}")
 
     def run(self):
         while True:
@@ -47,19 +61,14 @@ class TaskCLI:
             print("5. Удалить задачу")
             print("6. Поиск задач")
             print("7. Просмотр задач по категории")
+            print("8. Статистика производительности")
             print("\n0. Выход")
 
-            choice = input("\nВыберите действие (0-7):    ")
+            choice = input("\nВыберите действие (0-8):    ")
 
             if choice == "1":
                 print("\nСписок задач:")
-                tasks = self.manager.view_tasks()
-                for task in tasks:
-                    status = "Выполнена" if task.completed else "Не выполнена"
-                    deadline_str = task.deadline.isoformat() if task.deadline else "Нет срока"
-                    data = f"ID: {task.task_id} | Название: {task.title} | Категория: {task.category if task.category else "Не указанаё"}\n"\
-                            f"Статус: {status} | Приоритет: {task.priority} | Срок сдачи: {deadline_str}\n" 
-                    print(data)
+                TaskPager(self.manager.view_page, self.manager.count_tasks()).run()
 
             elif choice == "2":
                 title = self.get_non_empty_input("Введите заголовок задачи:  ", "Название")
@@ -68,7 +77,10 @@ class TaskCLI:
                 deadline_str = input("Введите срок выполнения задачи (YYYY-MM-DD или оставьте пустым):  ") or None
                 priority = input("Введите приоритет задачи (низкий/средний/высокий):  ") or "низкий"
 
-                self.manager.add_task(title, description=description, category=category, deadline=deadline_str, priority=priority)
+                try:
+                    self.manager.add_task(title, description=description, category=category, deadline=deadline_str, priority=priority)
+                except (ValidationError, DuplicateTaskError, StaleDataError) as e:
+                    print(e)
 
             elif choice == "3":
                 try:
@@ -90,7 +102,7 @@ class TaskCLI:
                     updates_cleaned_filtered = {k: v for k, v in updates_cleaned_filtered.items() if v is not None}
 
                     self.manager.edit_task(task_id=task_id, **updates_cleaned_filtered)
-                except NoResultFound as e:
+                except (NoResultFound, ValidationError, StaleDataError) as e:
                     print(e)
 
             elif choice == "4":
@@ -98,7 +110,7 @@ class TaskCLI:
                     task_id = int(self.get_non_empty_input("Введите ID задачи для изменения ее статуса:  ", "ID"))
                     new_status = bool(input("Введите любой символ, чтобы отметить задачу выполненной (или оставьте пустым для пропуска):  "))
                     self.manager.change_status(task_id, new_status)
-                except NoResultFound as e:
+                except (NoResultFound, StaleDataError) as e:
                     print(e)
 
             elif choice == "5":
@@ -109,7 +121,7 @@ class TaskCLI:
                         print(f"Задача с ID {task_id} была успешно удалена.")
                     else:
                         print(f"Задача с ID {task_id} не найдена.")
-                except NoResultFound as e:
+                except (NoResultFound, StaleDataError) as e:
                     print(e)
 
             elif choice == "6":
@@ -118,26 +130,27 @@ class TaskCLI:
                 completed_search_str = input("Искать выполненные задачи? (да/нет): ").strip().lower()
                 completed_search = True if completed_search_str == 'да' else False if completed_search_str == 'нет' else None
                 
-                results = self.manager.searcher.search(self.manager.view_tasks(), keyword=keyword,
-                                                        category=category_search, completed=completed_search)
+                results = self.manager.search(keyword=keyword, category=category_search, completed=completed_search)
                 
                 print("\nРезультаты поиска:")
-                for result in results:
-                    status_text = "Выполнена" if result.completed else "Не выполнена"
-                    data = f"ID: {result.task_id} | Название: {result.title} | Категория: {result.category if result.category else "Не указана"}\n"\
-                        f"Статус: {status_text} | Приоритет: {result.priority} | Срок сдачи: {result.deadline.isoformat() if result.deadline else "Нет срока"}\n"\
-                            f"Описание: {result.description if result.description else "Нет описания"}\n"
-
-                    
-                    print(data)
+                TaskPager.for_list(results, details=True).run()
 
             elif choice == "7":
                 self.view_tasks_by_category()
+
+            elif choice == "8":
+                self.show_stats()
             
             elif choice == "0":
                 print("Завершение программы...")
+                try:
+                    self.manager.close()
+                except StaleDataError as e:
+                    print(f"Ошибка: {e} Последние изменения не сохранены.")
+                if instrumentation.STATS.enabled:
+                    print(instrumentation.STATS.table())
                 break
 
             else:
-                print("Действие не найдено. Укажите действие (0-7):  ")
-                self.run()
+                print("Действие не найдено. Укажите действие (0-8):  ")
+                continue
@@ -0,0 +1,124 @@
+import heapq
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, Union
+from datetime import datetime
+
+from .model import Task, Priority, TASK_ORDERINGS
+from .indexes import fold
+
+# Проверки условий запроса: условие -> фабрика функции-предиката от задачи. Значения условий хранятся уже нормализованными
+# (см. методы Query), текст сворачивается так же, как fold. Порядок словаря - порядок проверки: сначала обычно самые
+# селективные условия (подстрока, категория), последним - статус, который отсекает в среднем половину задач.
+PREDICATES = {
+    "keyword": lambda value: lambda task: value in task.title.lower() or (task.description and value in task.description.lower()),
+    "title": lambda value: lambda task: value in task.title.lower(),
+    "category": lambda value: lambda task: task.category is not None and task.category.lower() == value,
+    "priority": lambda value: lambda task: task.priority_level == value,
+    "due_before": lambda value: lambda task: task.deadline is not None and task.deadline < value,
+    "due_after": lambda value: lambda task: task.deadline is not None and task.deadline >= value,
+    "completed": lambda value: lambda task: task.completed == value,
+}
+
+class Query:
+    """Запрос к задачам: набор условий, сортировка и ограничение числа результатов.
+    Методы-условия возвращают сам запрос, поэтому их можно соединять в цепочку:
+    Query().category("проект").open().due_before(d).priority("высокий").order_by("deadline").limit(20).
+    Повторный вызов того же условия заменяет его значение. Выполняет запрос TaskSearcher.select."""
+    def __init__(self):
+        self.conditions: dict[str, Any] = {}
+        self.ordering: Optional[str] = None
+        self.max_results: Optional[int] = None
+
+    @classmethod
+    def from_params(cls, keyword: Optional[str] = None, category: Optional[str] = None, completed: Optional[bool] = None) -> "Query":
+        """Запрос из параметров прежнего поиска (пустые keyword и category не ограничивают выборку)."""
+        query = cls()
+        if keyword:
+            query.text(keyword)
+        if category:
+            query.category(category)
+        if completed is not None:
+            query.status(completed)
+        return query
+
+    def _where(self, name: str, value: Any) -> "Query":
+        self.conditions[name] = value
+        return self
+
+    def text(self, keyword: str) -> "Query":
+        """Подстрока в названии или описании (без учета регистра)."""
+        return self._where("keyword", fold(keyword))
+
+    def title(self, keyword: str) -> "Query":
+        """Подстрока только в названии (без учета регистра)."""
+        return self._where("title", fold(keyword))
+
+    def category(self, category: str) -> "Query":
+        """Категория (без учета регистра)."""
+        return self._where("category", fold(category))
+
+    def status(self, completed: bool) -> "Query":
+        return self._where("completed", bool(completed))
+
+    def open(self) -> "Query":
+        """Только невыполненные задачи."""
+        return self.status(False)
+
+    def done(self) -> "Query":
+        """Только выполненные задачи."""
+        return self.status(True)
+
+    def priority(self, priority: Union[Priority, int, str]) -> "Query":
+        """Приоритет ("низкий"/"средний"/"высокий" или Priority). Вызывает ValidationError."""
+        return self._where("priority", Priority.parse(priority))
+
+    def due_before(self, deadline: datetime) -> "Query":
+        """Срок сдачи строго раньше deadline (задачи без срока не подходят)."""
+        return self._where("due_before", deadline)
+
+    def due_after(self, deadline: datetime) -> "Query":
+        """Срок сдачи не раньше deadline (задачи без срока не подходят)."""
+        return self._where("due_after", deadline)
+
+    def order_by(self, ordering: Optional[str]) -> "Query":
+        """Сортировка по ключу из TASK_ORDERINGS (None - порядок добавления)."""
+        if ordering is not None and ordering not in TASK_ORDERINGS:
+            raise ValueError(f"Неизвестная сортировка: {ordering}. Доступны: {', '.join(TASK_ORDERINGS)}.")
+        self.ordering = ordering
+        return self
+
+    def limit(self, count: Optional[int]) -> "Query":
+        """Не больше count результатов (None - без ограничения)."""
+        if count is not None and count < 0:
+            raise ValueError("Ограничение числа результатов не может быть отрицательным.")
+        self.max_results = count
+        return self
+
+    def key(self) -> tuple:
+        """Нормализованный ключ запроса (для кэша результатов): одинаковые запросы дают одинаковые ключи
+        независимо от порядка условий и регистра текста."""
+        return tuple(sorted(self.conditions.items())), self.ordering, self.max_results
+
+    def _predicates(self, resolved: Iterable[str] = ()) -> list:
+        resolved = set(resolved)
+        return [predicate(self.conditions[name]) for name, predicate in PREDICATES.items()
+                if name in self.conditions and name not in resolved]
+
+    def matches(self, task: Task) -> bool:
+        """Удовлетворяет ли задача всем условиям запроса."""
+        return all(check(task) for check in self._predicates())
+
+    def filter(self, tasks: Iterable[Task], resolved: Iterable[str] = ()) -> Iterator[Task]:
+        """Потоковое применение запроса к задачам в порядке их следования. Условия из resolved уже выполнены для всех tasks
+        (например, отобраны индексом) и повторно не проверяются. Без сортировки перебор прекращается на limit-й подходящей задаче,
+        с сортировкой и limit хранятся только limit лучших задач (heapq)."""
+        matched = iter(tasks)
+        for check in self._predicates(resolved): # Цепочка ленивых filter: следующее условие видит только прошедшие предыдущие
+            matched = filter(check, matched)
+
+        if self.ordering is None:
+            return islice(matched, self.max_results)
+        key = TASK_ORDERINGS[self.ordering]
+        if self.max_results is not None:
+            return iter(heapq.nsmallest(self.max_results, matched, key=key))
+        return iter(sorted(matched, key=key))
@@ -0,0 +1,98 @@
+import sys
+from typing import Callable, Optional, TextIO
+
+from .model import Task, TASK_ORDERINGS
+
+SORT_OPTIONS = {"приоритет": "priority", "срок": "deadline", "статус": "status"} # Ключи сортировки в интерфейсе -> TASK_ORDERINGS
+
+Fetch = Callable[[int, int, Optional[str]], list[Task]] # (offset, limit, order_by) -> задачи страницы
+
+def format_task(task: Task, details: bool = False) -> str:
+    """Текстовое представление задачи для вывода в консоль. details=True добавляет описание."""
+    status = "Выполнена" if task.completed else "Не выполнена"
+    deadline = task.deadline.isoformat() if task.deadline else "Нет срока"
+    text = f"ID: {task.task_id} | Название: {task.title} | Категория: {task.category or 'Не указана'}\n" \
+           f"Статус: {status} | Приоритет: {task.priority} | Срок сдачи: {deadline}\n"
+    if details:
+        text += f"Описание: {task.description or 'Нет описания'}\n"
+    return text
+
+def list_fetcher(tasks: list[Task]) -> Fetch:
+    """Источник страниц для уже готового списка задач (результаты поиска, категории).
+    Отсортированный вариант списка строится один раз на каждый ключ сортировки."""
+    orderings: dict[Optional[str], list[Task]] = {None: tasks}
+
+    def fetch(offset: int, limit: int, order_by: Optional[str]) -> list[Task]:
+        if order_by not in orderings:
+            orderings[order_by] = sorted(tasks, key=TASK_ORDERINGS[order_by])
+        return orderings[order_by][offset:offset + limit]
+
+    return fetch
+
+class TaskPager:
+    """Постраничный вывод задач. Слой представления (Presentation layer).
+
+    Форматируются только задачи текущей страницы, которые запрашиваются у источника fetch,
+    поэтому показ страницы стоит O(размер страницы), а не O(число задач). Страница выводится одной буферизованной записью."""
+    def __init__(self, fetch: Fetch, total: int, page_size: int = 10, details: bool = False, out: Optional[TextIO] = None):
+        self.fetch = fetch
+        self.total = total
+        self.page_size = page_size
+        self.details = details
+        self.out = out if out is not None else sys.stdout
+        self.page = 0
+        self.order_by: Optional[str] = None
+
+    @classmethod
+    def for_list(cls, tasks: list[Task], **kwargs) -> "TaskPager":
+        return cls(list_fetcher(tasks), len(tasks), **kwargs)
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+    def jump(self, page: int):
+        """Переход на страницу (нумерация с нуля), номер ограничивается допустимым диапазоном."""
+        self.page = min(max(page, 0), self.pages - 1)
+
+    def sort(self, order_by: Optional[str]):
+        """Смена сортировки (ключ из TASK_ORDERINGS или None - порядок добавления) с возвратом на первую страницу."""
+        self.order_by = order_by
+        self.page = 0
+
+    def render(self) -> str:
+        tasks = self.fetch(self.page * self.page_size, self.page_size, self.order_by)
+        parts = [format_task(task, self.details) for task in tasks]
+        parts.append(f"Страница {self.page + 1}/{self.pages} (всего задач: {self.total})\n")
+        return "\n".join(parts)
+
+    def show(self):
+        self.out.write(self.render())
+        self.out.flush()
+
+    def run(self, read: Callable[[str], str] = input):
+        """Интерактивный просмотр: Enter/n - дальше, p - назад, номер - переход на страницу,
+        s <приоритет|срок|статус> - сортировка (s без ключа - исходный порядок), q - выход."""
+        options = "/".join(SORT_OPTIONS)
+        while True:
+            self.show()
+            if self.pages == 1:
+                return
+
+            command = read(f"[Enter/n] далее, p назад, <номер> страница, s <{options}> сортировка, q выход:  ").strip().lower()
+            if command in ("", "n"):
+                if self.page == self.pages - 1:
+                    return
+                self.jump(self.page + 1)
+            elif command == "p":
+                self.jump(self.page - 1)
+            elif command.isdigit():
+                self.jump(int(command) - 1)
+            elif command.startswith("s"):
+                key = command[1:].strip()
+                if key and key not in SORT_OPTIONS:
+                    self.out.write(f"Неизвестная сортировка: {key}. Доступны: {options}.\n")
+                    continue
+                self.sort(SORT_OPTIONS.get(key))
+            elif command == "q":
+                return
@@ -1,57 +1,574 @@
-import os
-import json
+import threading
+from itertools import count, islice
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable, Iterator, Optional, Union
 from datetime import datetime
 
-from .model import Task
-from .utils import NoResultFound
+from .model import Task, Priority, TASK_ORDERINGS
+from .storage import JsonStorage, JournalStorage, BackgroundJsonStorage, atomic_open, iter_entry_ops
+from .locking import FileLock
+from .ids import NODE_MASK
+from .instrumentation import instrumented, timed, STATS
+from .columnar import TaskColumns
+from .indexes import CategoryIndex, StatusIndex, DeadlineIndex, TextIndex
+from .utils import NoResultFound, DuplicateTaskError
+from .sqlite_repository import SqliteTaskRepository
+from .binary import BinaryStorage, BinarySnapshot
 
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+BINARY_EXTENSIONS = (".ttdb",)
+BACKENDS = ("json", "journal", "sqlite", "binary")
+
+def detect_backend(filename: str) -> str:
+    """Тип хранилища по расширению файла: .db/.sqlite/.sqlite3 - SQLite, .ttdb - двоичный снимок, иначе JSON."""
+    filename = str(filename)
+    if filename.endswith(SQLITE_EXTENSIONS):
+        return "sqlite"
+    if filename.endswith(BINARY_EXTENSIONS):
+        return "binary"
+    return "json"
+
+@instrumented
 class TaskRepository:
-    """Класс для работы с хранилищем задач. Манипуляции объектом класса Task реализуются здесь. Слой доступа к данным (Data access layer)."""
-    def __init__(self, filename):
+    """Класс для работы с хранилищем задач. Манипуляции объектом класса Task реализуются здесь. Слой доступа к данным (Data access layer).
+    storage - формат хранения (по умолчанию JsonStorage), background_load - загрузка в фоне, shared - совместный доступ процессов (см. refresh)."""
+    runs_queries = False # Запросы Query планирует и выполняет TaskSearcher (см. lookup)
+
+    def __init__(self, filename, storage: Optional[JsonStorage] = None, background_load: bool = False, shared: bool = False):
         self.filename = filename
-        self.tasks = []
-        self.load_tasks()
+        self.storage = storage if storage is not None else JsonStorage(filename)
+        if shared and isinstance(self.storage, BackgroundJsonStorage):
+            raise ValueError("Фоновая запись несовместима с совместным доступом: запись должна выполняться под блокировкой.")
+        self._file_lock = FileLock(filename) if shared else None
+        self._version: Optional[tuple] = None # Версия файла, которой соответствуют данные в памяти (только при shared=True)
+        self._tasks: dict[int, Task] = {} # Индекс task_id -> Task. Словарь сохраняет порядок добавления, удаление не сдвигает элементы
+        self._positions: dict[int, int] = {} # task_id -> порядковый номер добавления, для выдачи выборок в исходном порядке
+        self._next_position = count()
+
+        self.category_index = CategoryIndex()
+        self.status_index = StatusIndex()
+        self.deadline_index = DeadlineIndex()
+        self.indexes = [self.category_index, self.status_index, self.deadline_index]
+        self._revision = 0 # Счетчик изменений данных в памяти (см. revision)
+        self._columns: Optional[TaskColumns] = None # Колоночный снимок для массовой фильтрации, сбрасывается при изменениях
+        self._orderings: dict[str, list[Task]] = {} # Отсортированные списки задач для постраничного просмотра, сбрасываются при изменениях
+        self._batch_ops: Optional[list[tuple[str, dict]]] = None # Операции текущего пакета (None - пакет не открыт)
+        self._batch_size = 0 # Число изменений в пакете (операции хранятся, только если они нужны хранилищу)
+        self._undo: Optional[list[tuple]] = None # Журнал отмены текущего пакета
+        self._snapshot: Optional[BinarySnapshot] = None # Двоичный снимок, задачи из которого еще не декодированы (см. _materialize)
+        self._decoded: dict[int, Task] = {} # Номер записи снимка -> уже декодированная задача
+        self._records: Optional[dict[int, int]] = None # task_id -> номер записи снимка, строится при первом поиске по ID
+
+        self._loaded = threading.Event()
+        self._load_lock = threading.Lock()
+        self._load_error: Optional[BaseException] = None
+        if background_load:
+            threading.Thread(target=self._load_in_background, name="ttdm-loader", daemon=True).start()
+        else:
+            self.load_tasks()
+
+    def _load_in_background(self):
+        try:
+            self.load_tasks()
+        except BaseException as e:
+            self._load_error = e
+            self._loaded.set()
+
+    def _join_loader(self):
+        if not self._loaded.is_set():
+            self._loaded.wait()
+        if self._load_error is not None:
+            raise self._load_error
+
+    def wait_loaded(self):
+        """Ожидание окончания загрузки задач (и декодирования отложенного снимка). Ошибка фоновой загрузки пробрасывается здесь."""
+        self._join_loader()
+        if self._snapshot is not None:
+            self._materialize()
+
+    @contextmanager
+    def _pending_snapshot(self):
+        """Отложенный снимок, по которому можно ответить без декодирования всех задач (None - задачи уже в памяти).
+        Пока блок with выполняется, снимок не декодируется целиком и не закрывается другим потоком."""
+        self._join_loader()
+        if self._snapshot is None:
+            yield None
+            return
+        with self._load_lock:
+            yield self._snapshot
+
+    def _ready(self):
+        """Подготовка к чтению: окончание загрузки и, при совместном доступе, подхват чужих изменений."""
+        self.wait_loaded()
+        if self._file_lock is not None:
+            self.refresh()
+
+    def _locked(self, shared: bool = False):
+        return self._file_lock.hold(shared) if self._file_lock is not None else nullcontext()
+
+    @timed
+    def refresh(self) -> bool:
+        """Подхват изменений, записанных другими процессами. Возвращает True, если данные в памяти обновились.
+        Без shared=True ничего не делает."""
+        if self._file_lock is None:
+            return False
+        with self._file_lock.hold(shared=True):
+            version = self.storage.version()
+            if version == self._version:
+                return False
+            entries = self.storage.changes_since(self._version)
+            if entries is None:
+                self._reload()
+            else:
+                for entry in entries:
+                    self._replay(entry)
+            self._version = version
+        return True
+
+    def _reload(self):
+        """Полная перезагрузка задач из хранилища (словари очищаются на месте: на них ссылаются индексы)."""
+        with self._load_lock:
+            self._tasks.clear()
+            self._positions.clear()
+            self._read()
+            for index in self.indexes:
+                index.rebuild(self._tasks.values())
+            self._invalidate()
+
+    def _replay(self, entry: dict):
+        """Применение записи журнала, сделанной другим процессом, к задачам в памяти (с обновлением индексов)."""
+        for op, *args in iter_entry_ops(entry):
+            if op == "add":
+                if args[0].task_id not in self._tasks:
+                    self._insert(args[0])
+            elif op == "delete":
+                if args[0] in self._tasks:
+                    self._remove(self._tasks[args[0]])
+            elif args[0] in self._tasks:
+                self._apply(self._tasks[args[0]], args[1])
 
+    @contextmanager
+    def _writing(self):
+        """Изменение данных. При shared=True - под эксклюзивной блокировкой файла: сначала подхватываются чужие изменения,
+        а после записи запоминается новая версия файла. Пакет держит блокировку целиком, вложенные изменения ее не берут."""
+        if self._file_lock is None or self._batch_ops is not None:
+            yield
+            return
+        with self._file_lock.hold():
+            self.refresh()
+            yield
+            self._version = self.storage.version()
+
+    @property
+    def tasks(self) -> list[Task]:
+        """Список всех задач в порядке добавления."""
+        self._ready()
+        return list(self._tasks.values())
+
+    def __len__(self) -> int:
+        with self._pending_snapshot() as snapshot:
+            if snapshot is not None:
+                return len(snapshot)
+        self._ready()
+        return len(self._tasks)
+
+    def __contains__(self, task_id: int) -> bool:
+        with self._pending_snapshot() as snapshot:
+            if snapshot is not None:
+                return task_id in self._snapshot_records()
+        self._ready()
+        return task_id in self._tasks
+
+    def max_task_id(self) -> int:
+        """Наибольший ID среди задач (0, если задач нет)."""
+        with self._pending_snapshot() as snapshot:
+            if snapshot is not None:
+                return max(snapshot.task_ids, default=0)
+        self._ready()
+        return max(self._tasks, default=0)
+
+    def claim_node(self) -> Optional[int]:
+        """Номер узла для TaskIdAllocator, уникальный среди процессов, работающих с файлом (shared=True): счетчик
+        <файл>.node увеличивается под эксклюзивной блокировкой, номер повторяется только через 1024 запуска.
+        Без shared=True файл открыт одним процессом и возвращается None (номер по PID)."""
+        if self._file_lock is None:
+            return None
+        counter = f"{self.filename}.node"
+        with self._file_lock.hold():
+            try:
+                with open(counter, "r", encoding="utf-8") as file:
+                    node = int(file.read() or 0) + 1
+            except (FileNotFoundError, ValueError):
+                node = 0
+            node &= NODE_MASK
+            with atomic_open(counter) as file:
+                file.write(str(node))
+        return node
+
+    @timed
     def load_tasks(self):
-        """Загрузка задач из файла JSON."""
-        if os.path.exists(self.filename):
-            with open(self.filename, "r", encoding="utf-8") as file:
-                task_data = json.load(file)
-                for data in task_data:
-                    data["deadline"] = datetime.fromisoformat(data["deadline"]) if data["deadline"] else None
-                    new_task = Task(**data)
-                    self.tasks.append(new_task)
+        """Загрузка задач из хранилища. При повторяющихся ID остается первая задача (как и раньше при поиске по ID)."""
+        with self._locked(shared=True):
+            self._version = self.storage.version()
+            # Двоичный снимок только открывается: задачи декодируются и индексы строятся при первой надобности.
+            # При shared=True данные перечитываются целиком при чужих изменениях, поэтому там задачи загружаются сразу
+            snapshot = self.storage.open_snapshot() if self._file_lock is None else None
+            if snapshot is None:
+                self._read()
+
+        with self._load_lock:
+            self._snapshot = snapshot
+            if snapshot is None:
+                for index in self.indexes:
+                    index.rebuild(self._tasks.values())
+            self._invalidate()
+            self._loaded.set()
 
+    @timed
+    def _materialize(self):
+        """Декодирование всех задач отложенного снимка и построение индексов. Уже выданные задачи переиспользуются."""
+        with self._load_lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            decoded = self._decoded
+            for record, task in enumerate(snapshot):
+                task = decoded.get(record, task)
+                if task.task_id not in self._tasks:
+                    self._tasks[task.task_id] = task
+                    self._positions[task.task_id] = next(self._next_position)
+            for index in self.indexes:
+                index.rebuild(self._tasks.values())
+            self._snapshot, self._decoded, self._records = None, {}, None
+            self._columns = None
+            snapshot.close()
+
+    def _snapshot_records(self) -> dict[int, int]:
+        """task_id -> номер записи отложенного снимка (ID в снимке уникальны: его пишет только репозиторий)."""
+        if self._records is None:
+            self._records = dict(zip(self._snapshot.task_ids, range(len(self._snapshot))))
+        return self._records
+
+    def _snapshot_task(self, record: int) -> Task:
+        """Задача записи снимка: декодируется при первом обращении и далее та же самая."""
+        task = self._decoded.get(record)
+        if task is None:
+            task = self._decoded[record] = self._snapshot.task(record)
+        return task
+
+    def _read(self):
+        for task in self.storage.load():
+            if task.task_id not in self._tasks:
+                self._tasks[task.task_id] = task
+                self._positions[task.task_id] = next(self._next_position)
+
+    @timed
     def save_tasks(self):
-        """Сохранение задач в файл JSON."""
-        with open(self.filename, "w", encoding="utf-8") as file:
-            json.dump([task.to_dict() for task in self.tasks], file, ensure_ascii=False)
+        """Сохранение всех задач в хранилище."""
+        self.wait_loaded()
+        with self._writing():
+            self.storage.save(self._tasks.values())
+
+    def flush(self):
+        """Ожидание записи всех изменений в хранилище."""
+        self._join_loader()
+        self.storage.flush()
+
+    def close(self):
+        """Сброс незаписанных изменений и закрытие хранилища."""
+        self._join_loader()
+        self.storage.close()
+        with self._load_lock:
+            if self._snapshot is not None:
+                self._snapshot.close()
+                self._snapshot = None
+
+    def attach_index(self, index: TextIndex):
+        """Подключение дополнительного индекса. Индекс строится по текущим задачам (или по окончании фоновой загрузки)
+        и далее обновляется при каждом изменении."""
+        with self._load_lock:
+            self.indexes.append(index)
+            if self._loaded.is_set() and self._snapshot is None:
+                index.rebuild(self._tasks.values())
 
+    @contextmanager
+    def batch(self):
+        """Пакет изменений: все изменения внутри блока with сохраняются одной записью в хранилище при выходе из него.
+        При исключении изменения в памяти откатываются, а в хранилище ничего не пишется. Вложенные пакеты входят во внешний."""
+        self.wait_loaded()
+        if self._batch_ops is not None:
+            yield self
+            return
+
+        with self._writing():
+            self._batch_ops, self._undo, self._batch_size = [], [], 0
+            try:
+                yield self
+                if self._batch_size:
+                    self.storage.record_batch(self._batch_ops, self._tasks.values())
+            except BaseException:
+                self._rollback()
+                raise
+            finally:
+                self._batch_ops = self._undo = None
+
+    def _record(self, op: str, payload: Callable[[], dict]):
+        """Фиксация операции: сразу в хранилище или, внутри пакета, в список операций пакета.
+        Описание операции payload() строится, только если хранилище их использует (needs_ops)."""
+        payload = payload() if self.storage.needs_ops else None
+        if self._batch_ops is not None:
+            self._batch_size += 1
+            if payload is not None:
+                self._batch_ops.append((op, payload))
+        else:
+            self.storage.record(op, payload, self._tasks.values())
+
+    def _rollback(self):
+        """Отмена изменений текущего пакета в памяти (в обратном порядке)."""
+        undo, self._batch_ops, self._undo = self._undo, None, None
+        restored = False
+        for action, task, data in reversed(undo):
+            if action == "add":
+                self._remove(task)
+            elif action == "delete":
+                self._insert(task, position=data)
+                restored = True
+            else:
+                self._apply(task, data)
+
+        if restored: # Возвращенные задачи оказались в конце словаря: восстанавливаем исходный порядок (на месте - на словарь ссылаются индексы)
+            ordered = sorted(self._tasks.values(), key=lambda task: self._positions[task.task_id])
+            self._tasks.clear()
+            self._tasks.update((task.task_id, task) for task in ordered)
+
+    @property
+    def revision(self) -> int:
+        """Ревизия данных: меняется при каждом изменении задач (в том числе подхваченном у других процессов и при откате пакета).
+        По ней сервисный слой проверяет актуальность кэша результатов."""
+        self._ready()
+        return self._revision
+
+    def _invalidate(self):
+        """Сброс производных представлений (колонок и сортировок) после изменения данных."""
+        self._revision += 1
+        self._columns = None
+        self._orderings = {}
+
+    def _insert(self, task: Task, position: Optional[int] = None):
+        self._tasks[task.task_id] = task
+        self._positions[task.task_id] = next(self._next_position) if position is None else position
+        for index in self.indexes:
+            index.add(task)
+        self._invalidate()
+
+    def _remove(self, task: Task) -> int:
+        del self._tasks[task.task_id]
+        position = self._positions.pop(task.task_id)
+        for index in self.indexes:
+            index.discard(task)
+        self._invalidate()
+        return position
+
+    def _apply(self, task: Task, changes: dict):
+        affected = [index for index in self.indexes if not index.fields.isdisjoint(changes)]
+        for index in affected:
+            index.discard(task)
+        for key, value in changes.items():
+            setattr(task, key, value)
+        for index in affected:
+            index.add(task)
+        self._invalidate()
+
+    @timed
     def add_task(self, new_task: Task):
-        """Добавление новой задачи (транзакция)."""
-        self.tasks.append(new_task)
-        self.save_tasks()
+        """Добавление новой задачи (транзакция). Если ID уже занят, то выбрасывает DuplicateTaskError."""
+        self.wait_loaded()
+        with self._writing():
+            if new_task.task_id in self._tasks:
+                raise DuplicateTaskError(new_task.task_id)
+            self._insert(new_task)
+            if self._undo is not None:
+                self._undo.append(("add", new_task, None))
+            self._record("add", lambda: {"task": new_task.to_dict()})
+
+    @timed
+    def add_tasks(self, tasks: Iterable[Task]):
+        """Добавление множества задач одной записью в хранилище."""
+        with self.batch():
+            for task in tasks:
+                self.add_task(task)
 
+    @timed
+    def update_task(self, task_id: int, **changes) -> Task:
+        """Изменение полей задачи по ID (транзакция). Если задача не найдена, то выбрасывает NoResultFound.
+        Задачи следует менять только здесь, а не присваиванием атрибутов, иначе индексы разойдутся с данными."""
+        self.wait_loaded()
+        with self._writing():
+            task = self.get_task(task_id)
+            if "priority" in changes: # Проверяем до изменения задачи, чтобы ошибка не оставила индексы в промежуточном состоянии
+                changes["priority"] = Priority.parse(changes["priority"]).label
+            if self._undo is not None:
+                self._undo.append(("update", task, {key: getattr(task, key) for key in changes}))
+            self._apply(task, changes)
+
+            if changes.keys() == {"completed"}:
+                self._record("status", lambda: {"task_id": task_id, "completed": changes["completed"]})
+            else:
+                self._record("edit", lambda: {"task_id": task_id, "changes": changes})
+        return task
+
+    @timed
     def delete_task(self, task_id: int) -> bool:
         """Удаление задачи по ID (транзакция)."""
-        for task in self.tasks:
-            if task.task_id == task_id:
-                self.tasks.remove(task)
-                self.save_tasks()
-                return True
-        return False
+        self.wait_loaded()
+        with self._writing():
+            task = self._tasks.get(task_id)
+            if task is None:
+                return False
+            position = self._remove(task)
+            if self._undo is not None:
+                self._undo.append(("delete", task, position))
+            self._record("delete", lambda: {"task_id": task_id})
+        return True
 
+    @timed
     def get_task(self, task_id: int) -> Task:
         """Получение задачи по ID. Если задача не найдена, то выбрасывает NoResultFound."""
-        for task in self.tasks:
-            if task.task_id == task_id:
-                return task
-        raise NoResultFound(task_id)
+        with self._pending_snapshot() as snapshot:
+            if snapshot is not None:
+                record = self._snapshot_records().get(task_id)
+                if record is None:
+                    raise NoResultFound(task_id)
+                return self._snapshot_task(record)
+        self._ready()
+        try:
+            return self._tasks[task_id]
+        except KeyError:
+            raise NoResultFound(task_id) from None
+
+    @timed
+    def get_many(self, task_ids: Iterable[int]) -> list[Task]:
+        """Задачи по списку ID в порядке списка (отсутствующие ID пропускаются)."""
+        with self._pending_snapshot() as snapshot:
+            if snapshot is not None:
+                records = self._snapshot_records()
+                return [self._snapshot_task(records[task_id]) for task_id in task_ids if task_id in records]
+        self._ready()
+        return [self._tasks[task_id] for task_id in task_ids if task_id in self._tasks]
 
+    def lookup(self, condition: str, value) -> Optional[set[int]]:
+        """ID задач, удовлетворяющих условию запроса (см. Query), по индексу; None - индекса для условия нет."""
+        self._ready()
+        if condition == "category":
+            return self.category_index.lookup(value)
+        if condition == "completed":
+            return self.status_index.lookup(value)
+        if condition == "due_before":
+            return set(self.deadline_index.due_before(value))
+        return None
+
+    def _ordered(self, task_ids: Iterable[int]) -> list[Task]:
+        """Задачи по набору ID в порядке их добавления."""
+        return [self._tasks[task_id] for task_id in sorted(task_ids, key=self._positions.__getitem__)]
+
+    @timed
     def get_tasks_by_category(self, category: str) -> list[Task]:
         """Получить список задач по категории"""
-        return [task for task in self.tasks if task.category and task.category.lower() == category.lower()]
+        self._ready()
+        return self._ordered(self.category_index.lookup(category))
+
+    @timed
+    def get_tasks_due_before(self, deadline: datetime) -> list[Task]:
+        """Задачи со сроком сдачи раньше deadline, по возрастанию срока."""
+        self._ready()
+        return [self._tasks[task_id] for task_id in self.deadline_index.due_before(deadline)]
+
+    @timed
+    def filter_tasks(self, category: Optional[str] = None, completed: Optional[bool] = None, task_ids: Optional[set[int]] = None) -> list[Task]:
+        """Отбор задач по категории и/или статусу через индексы. Стоимость пропорциональна размеру выборки, а не числу задач.
+        task_ids - дополнительное ограничение набором ID (например, результатом полнотекстового индекса)."""
+        self._ready()
+        # ID из внешнего индекса могли устареть, если между поиском и отбором данные обновились (refresh)
+        candidates = [] if task_ids is None else [self._tasks.keys() & task_ids]
+        if category:
+            candidates.append(self.category_index.lookup(category))
+        if completed is not None:
+            candidates.append(self.status_index.lookup(completed))
+
+        if not candidates:
+            return self.tasks
+
+        candidates.sort(key=len)
+        return self._ordered(candidates[0].intersection(*candidates[1:]))
+
+    def iter_tasks(self, task_ids: Optional[set[int]] = None) -> Iterator[Task]:
+        """Ленивый перебор задач в порядке добавления, без копирования списка. task_ids - только задачи из набора
+        (проверка принадлежности, набор не сортируется). Перебор нужно закончить до следующего изменения данных."""
+        self._ready()
+        if task_ids is None:
+            return iter(self._tasks.values())
+        return map(self._tasks.__getitem__, filter(task_ids.__contains__, self._tasks))
 
     def view_tasks(self) -> list[Task]:
         """Возвращает список всех задач."""
         return self.tasks
+
+    @timed
+    def view_page(self, offset: int, limit: int, order_by: Optional[str] = None) -> list[Task]:
+        """Срез задач [offset, offset + limit). Без сортировки стоит O(offset + limit), не трогая остальные задачи;
+        с сортировкой (ключ из TASK_ORDERINGS) список сортируется один раз и переиспользуется до следующего изменения."""
+        with self._pending_snapshot() as snapshot:
+            if snapshot is not None and order_by is None:
+                return [self._snapshot_task(record) for record in range(offset, min(offset + limit, len(snapshot)))]
+        self._ready()
+        if order_by is None:
+            return list(islice(self._tasks.values(), offset, offset + limit))
+
+        ordered = self._orderings.get(order_by)
+        if ordered is None:
+            ordered = self._orderings[order_by] = sorted(self._tasks.values(), key=TASK_ORDERINGS[order_by])
+        return ordered[offset:offset + limit]
+
+    def columns(self) -> Union[TaskColumns, BinarySnapshot]:
+        """Колоночное представление всех задач. Строится при первом обращении после изменения данных;
+        до первого изменения двоичного хранилища это столбцы самого снимка."""
+        with self._pending_snapshot() as snapshot:
+            if snapshot is not None:
+                return snapshot
+        self._ready()
+        if self._columns is None:
+            self._columns = TaskColumns.from_tasks(self._tasks.values())
+        return self._columns
+
+    @timed
+    def bulk_filter(self, category: Optional[str] = None, completed: Optional[bool] = None,
+                    priority: Optional[Priority] = None, due_before: Optional[datetime] = None) -> list[Task]:
+        """Массовая фильтрация по нескольким полям через колоночное представление."""
+        with self._pending_snapshot() as snapshot:
+            if snapshot is not None:
+                if STATS.enabled:
+                    STATS.count("Массовый фильтр: просмотрено задач", len(snapshot))
+                return [self._snapshot_task(record) for record in snapshot.records(category, completed, priority, due_before)]
+        columns = self.columns()
+        if STATS.enabled:
+            STATS.count("Массовый фильтр: просмотрено задач", len(columns))
+        return [self._tasks[task_id] for task_id in columns.filter(category, completed, priority, due_before)]
+
+def open_repository(filename: str, storage: Optional[JsonStorage] = None, background_load: bool = False, backend: Optional[str] = None,
+                    background_save: bool = False, shared: bool = False):
+    """Создание репозитория по имени файла: .db/.sqlite/.sqlite3 - SQLite, .ttdb - двоичный снимок, иначе JSON.
+    backend задает формат явно; background_save - запись JSON в фоне (при shared=True не действует)."""
+    if backend is None:
+        backend = detect_backend(filename)
+
+    if backend == "sqlite":
+        return SqliteTaskRepository(filename)
+    if backend == "journal":
+        storage = JournalStorage(filename)
+    elif backend == "binary":
+        storage = BinaryStorage(filename)
+    elif backend != "json":
+        raise ValueError(f"Неизвестный тип хранилища: {backend}.")
+    elif storage is None and background_save and not shared:
+        storage = BackgroundJsonStorage(filename)
+    return TaskRepository(filename, storage, background_load=background_load, shared=shared)
@@ -0,0 +1,343 @@
+"""Сервис задач на asyncio с HTTP/JSON-интерфейсом (только стандартная библиотека). Слой представления (Presentation layer).
+
+Один процесс держит в памяти один TaskManager и обслуживает много клиентов одновременно. Чтения выполняются сразу
+в цикле событий, а изменения проходят через одну очередь: писатель забирает все накопившиеся операции и применяет их
+одним пакетом (manager.batch), поэтому на диск уходит одна запись на пакет, а читатели никогда не видят пакет наполовину.
+Ответ на изменение отправляется после записи пакета на диск (manager.flush в отдельном потоке).
+Хранилище JSON при каждом пакете снимает копию всех задач в цикле событий и переписывает файл целиком;
+при частых изменениях выгоднее журнальное хранилище (--backend journal), которое дописывает только сам пакет.
+
+Запуск: python -m src.server [tasks.json] [--host 127.0.0.1] [--port 8080] [--unix /tmp/ttdm.sock] [--backend journal]
+
+    GET    /tasks?keyword=&category=&completed=true|false&order_by=&limit=&offset=   поиск (Query)
+    GET    /tasks/<id>                                                              одна задача
+    POST   /tasks          {"title": ..., "description", "category", "deadline": "YYYY-MM-DD", "priority"}
+    PATCH  /tasks/<id>     {"title", "description", "category", "deadline", "priority"}
+    PUT    /tasks/<id>/status   {"completed": true|false}
+    DELETE /tasks/<id>
+    GET    /stats"""
+import re
+import json
+import asyncio
+import argparse
+from typing import Any, Callable, Optional
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl
+
+from .query import Query
+from .services import IndexedTaskSearcher, TaskManager
+from .repository import BACKENDS
+from .utils import NoResultFound, DuplicateTaskError, ValidationError
+
+EDITABLE_FIELDS = frozenset({"title", "description", "category", "deadline", "priority"})
+MAX_BODY = 1 << 20
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def parse_deadline(value: Optional[str]) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise HttpError(400, f"Срок сдачи должен быть строкой YYYY-MM-DD: {value}.") from None
+
+def parse_bool(value: str) -> bool:
+    if value in ("true", "1", "да"):
+        return True
+    if value in ("false", "0", "нет"):
+        return False
+    raise HttpError(400, f"Ожидалось true или false: {value}.")
+
+class TaskService:
+    """Асинхронный доступ к одному TaskManager: чтения - сразу, изменения - через очередь пакетами до max_batch операций."""
+    def __init__(self, manager: TaskManager, max_batch: int = 256):
+        self.manager = manager
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self):
+        """Остановка писателя после обработки уже поставленных операций и закрытие хранилища."""
+        if self._writer is not None:
+            await self._queue.join()
+            self._writer.cancel()
+        self.manager.close()
+
+    async def write(self, operation: Callable, *args) -> Any:
+        """Постановка изменения в очередь и ожидание его записи. Ошибка операции пробрасывается вызывающему."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, args, future))
+        return await future
+
+    async def _write_loop(self):
+        while True:
+            items = [await self._queue.get()]
+            while len(items) < self.max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            outcomes = []
+            try:
+                with self.manager.batch():
+                    for operation, args, future in items:
+                        try: # Операции проверяют данные до изменения задач, поэтому ошибка одной не портит остальные
+                            outcomes.append((future, operation(*args), None))
+                        except (NoResultFound, DuplicateTaskError, ValidationError, ValueError) as e:
+                            outcomes.append((future, None, e))
+                # Ответ - только после записи на диск (фоновая запись JSON, fsync журнала). Ожидание идет в потоке:
+                # чтения тем временем обслуживаются, а новые изменения копятся в очереди для следующего пакета
+                await asyncio.get_running_loop().run_in_executor(None, self.manager.flush)
+            except Exception as e: # Пакет не записан (и, если ошибка в самом пакете, откатан целиком)
+                outcomes = [(future, None, e) for _, _, future in items]
+
+            self.batches += 1
+            self.writes += len(items)
+            for future, result, error in outcomes:
+                if not future.done():
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+            for _ in items:
+                self._queue.task_done()
+
+    # Чтения
+    def search(self, params: dict) -> list[dict]:
+        query = Query()
+        if params.get("keyword"):
+            query.text(params["keyword"])
+        if params.get("title"):
+            query.title(params["title"])
+        if params.get("category"):
+            query.category(params["category"])
+        if params.get("completed"):
+            query.status(parse_bool(params["completed"]))
+        if params.get("priority"):
+            query.priority(params["priority"])
+        if params.get("due_before"):
+            query.due_before(parse_deadline(params["due_before"]))
+        try:
+            query.order_by(params.get("order_by") or None)
+            offset = int(params.get("offset", 0))
+            limit = int(params["limit"]) if "limit" in params else None
+            query.limit(None if limit is None else offset + limit)
+        except ValueError as e:
+            raise HttpError(400, str(e)) from None
+        return [task.to_dict() for task in self.manager.select(query)[offset:]]
+
+    def get(self, task_id: int) -> dict:
+        return self.manager.repository.get_task(task_id).to_dict()
+
+    def stats(self) -> dict:
+        return {"tasks": self.manager.count_tasks(), "batches": self.batches, "writes": self.writes,
+                "queued": self._queue.qsize() if self._queue is not None else 0, "cache": self.manager.cache_stats()}
+
+    # Изменения
+    @staticmethod
+    def _check_fields(fields: dict):
+        """Проверка полей до постановки в очередь: в пакете писателя ошибка должна возникать раньше изменения задачи."""
+        unknown = fields.keys() - EDITABLE_FIELDS
+        if unknown:
+            raise HttpError(400, f"Неизвестные поля: {', '.join(sorted(unknown))}. Изменяемые поля: {', '.join(sorted(EDITABLE_FIELDS))}.")
+        if "title" in fields and (not isinstance(fields["title"], str) or not fields["title"].strip()):
+            raise HttpError(400, "Название не может быть пустым.")
+        for name in ("description", "category", "deadline"):
+            if not isinstance(fields.get(name), (str, type(None))):
+                raise HttpError(400, f"Поле {name} должно быть строкой.")
+        if not isinstance(fields.get("priority", ""), (str, int)):
+            raise HttpError(400, "Поле priority должно быть строкой или числом.")
+        parse_deadline(fields.get("deadline"))
+
+    async def add(self, fields: dict) -> int:
+        if "title" not in fields:
+            raise HttpError(400, "Поле title обязательно.")
+        self._check_fields(fields)
+        (task_id,) = await self.write(self.manager.add_tasks, [fields])
+        return task_id
+
+    async def edit(self, task_id: int, fields: dict) -> dict:
+        if not fields:
+            raise HttpError(400, "Нет изменяемых полей.")
+        self._check_fields(fields)
+        if "deadline" in fields:
+            fields = {**fields, "deadline": parse_deadline(fields["deadline"])}
+        return (await self.write(self._update, task_id, fields)).to_dict()
+
+    async def set_status(self, task_id: int, completed: Any) -> dict:
+        if not isinstance(completed, bool):
+            raise HttpError(400, "Поле completed должно быть true или false.")
+        return (await self.write(self._update, task_id, {"completed": completed})).to_dict()
+
+    async def delete(self, task_id: int) -> bool:
+        return await self.write(self.manager.delete_task, task_id)
+
+    def _update(self, task_id: int, changes: dict):
+        return self.manager.repository.update_task(task_id, **changes)
+
+ROUTES = [
+    ("GET", re.compile(r"/tasks"), "list_tasks"),
+    ("POST", re.compile(r"/tasks"), "add_task"),
+    ("GET", re.compile(r"/tasks/(\d+)"), "get_task"),
+    ("PATCH", re.compile(r"/tasks/(\d+)"), "edit_task"),
+    ("DELETE", re.compile(r"/tasks/(\d+)"), "delete_task"),
+    ("PUT", re.compile(r"/tasks/(\d+)/status"), "set_status"),
+    ("GET", re.compile(r"/stats"), "stats"),
+]
+
+class HttpFrontend:
+    """Минимальный HTTP/1.1-сервер (keep-alive, тела в JSON) поверх TaskService."""
+    def __init__(self, service: TaskService):
+        self.service = service
+
+    async def list_tasks(self, params: dict, body: Any):
+        return 200, self.service.search(params)
+
+    async def add_task(self, params: dict, body: Any):
+        return 201, {"task_id": await self.service.add(self._object(body))}
+
+    async def get_task(self, params: dict, body: Any, task_id: str):
+        return 200, self.service.get(int(task_id))
+
+    async def edit_task(self, params: dict, body: Any, task_id: str):
+        return 200, await self.service.edit(int(task_id), self._object(body))
+
+    async def set_status(self, params: dict, body: Any, task_id: str):
+        return 200, await self.service.set_status(int(task_id), self._object(body).get("completed"))
+
+    async def delete_task(self, params: dict, body: Any, task_id: str):
+        if not await self.service.delete(int(task_id)):
+            raise NoResultFound(int(task_id))
+        return 200, {"deleted": int(task_id)}
+
+    async def stats(self, params: dict, body: Any):
+        return 200, self.service.stats()
+
+    @staticmethod
+    def _object(body: Any) -> dict:
+        if not isinstance(body, dict):
+            raise HttpError(400, "Тело запроса должно быть JSON-объектом.")
+        return body
+
+    async def dispatch(self, method: str, target: str, body: Any) -> tuple[int, Any]:
+        url = urlsplit(target)
+        allowed = False
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.fullmatch(url.path)
+            if match is None:
+                continue
+            allowed = True
+            if route_method == method:
+                try:
+                    return await getattr(self, handler)(dict(parse_qsl(url.query)), body, *match.groups())
+                except HttpError as e:
+                    return e.status, {"error": str(e)}
+                except NoResultFound as e:
+                    return 404, {"error": str(e)}
+                except (DuplicateTaskError, ValidationError, ValueError) as e:
+                    return 400, {"error": str(e)}
+        return (405, {"error": "Метод не поддерживается."}) if allowed else (404, {"error": "Неизвестный адрес."})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обработка соединения: запросы читаются по очереди, пока клиент не закроет соединение."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "Слишком большое тело запроса."}
+                else:
+                    raw = await reader.readexactly(length) if length else b""
+                    try:
+                        body = json.loads(raw) if raw else None
+                    except json.JSONDecodeError:
+                        status, payload = 400, {"error": "Тело запроса не является JSON."}
+                    else:
+                        try:
+                            status, payload = await self.dispatch(method, target, body)
+                        except Exception as e:
+                            status, payload = 500, {"error": str(e)}
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0" or status == 413
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(data)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n"
+                             .encode("latin-1") + data)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass # Оборванное или некорректное соединение просто закрывается
+        finally:
+            writer.close()
+
+async def call(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+               body: Any = None) -> tuple[int, Any]:
+    """Запрос к сервису по открытому keep-alive соединению (клиент для тестов и нагрузочного скрипта)."""
+    data = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: ttdm\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def start_server(manager: TaskManager, host: str = "127.0.0.1", port: int = 8080,
+                       unix: Optional[str] = None) -> tuple[asyncio.AbstractServer, TaskService]:
+    """Запуск сервиса и HTTP-интерфейса над manager (port=0 - свободный порт). Возвращает сервер и сервис;
+    после server.close() следует дождаться service.stop()."""
+    service = TaskService(manager)
+    service.start()
+    frontend = HttpFrontend(service)
+    if unix:
+        server = await asyncio.start_unix_server(frontend.handle, unix)
+    else:
+        server = await asyncio.start_server(frontend.handle, host, port)
+    return server, service
+
+async def serve(filename: str = "tasks.json", host: str = "127.0.0.1", port: int = 8080, unix: Optional[str] = None,
+                backend: Optional[str] = None):
+    """Работа сервиса до отмены. JSON-файл сохраняется в фоновом потоке, чтобы запись не останавливала цикл событий."""
+    manager = TaskManager(filename, IndexedTaskSearcher(), backend=backend, background_save=True)
+    server, service = await start_server(manager, host, port, unix)
+    address = unix or "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"TTDM слушает {address}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP/JSON-сервис задач TTDM.")
+    parser.add_argument("filename", nargs="?", default="tasks.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="путь Unix-сокета вместо TCP")
+    parser.add_argument("--backend", choices=BACKENDS, help="хранилище (по умолчанию - по расширению файла)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.filename, args.host, args.port, args.unix, args.backend))
+    except KeyboardInterrupt:
+        pass
@@ -1,70 +1,130 @@
-import time
-import hashlib
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional, Union
 from datetime import datetime
 
+from .ids import TaskIdAllocator
 from .model import Task
 from .utils import NoResultFound
-from .repository import TaskRepository
-
+from .storage import JsonStorage
+from .indexes import TextIndex
+from .query import Query
+from .cache import ResultCache
+from .instrumentation import instrumented, timed, STATS
+from .repository import TaskRepository, open_repository
+
+@instrumented
 class TaskSearcher:
     """Класс для поиска задач. 
     Функции, связанные с поиском объектов класса Task, реализуются здесь.
     Слой бизнес-логики (Service layer)."""
     @staticmethod
     def search(tasks: list[Task], keyword: Optional[str], category: Optional[str], completed: Optional[bool]) -> list[Task]:
-        results = tasks
-
-        if keyword:
-            keyword = keyword.lower()
-            results = [
-                t for t in results if keyword in t.title.lower() or (t.description and keyword in t.description.lower())
-                ]
-        if category:
-            results = [
-                t for t in results if t.category and t.category.lower() == category.lower()
-            ]
-        if completed is not None:
-            results = [
-                t for t in results if t.completed == completed
-            ]
-
-        return results
+        """Поиск по списку задач (обертка над Query)."""
+        if STATS.enabled:
+            STATS.count("Поиск: просмотрено задач", len(tasks))
+        return list(Query.from_params(keyword, category, completed).filter(tasks))
+
+    def lookup(self, repository: TaskRepository, condition: str, value) -> Optional[set[int]]:
+        """ID задач, удовлетворяющих условию запроса, по индексу; None - индекса для условия нет."""
+        return repository.lookup(condition, value)
+
+    def select(self, repository: TaskRepository, query: Query) -> Iterator[Task]:
+        """Выполнение запроса: пересечение множеств ID из индексов (начиная с самого маленького), остальные условия
+        проверяются потоково до limit. Репозиторий, выполняющий запросы сам (SQLite), получает запрос целиком."""
+        if repository.runs_queries:
+            return repository.select(query)
+
+        repository.wait_loaded()
+        repository.refresh()
+        candidates, resolved = [], []
+        for name, value in query.conditions.items():
+            ids = self.lookup(repository, name, value)
+            if ids is not None:
+                candidates.append(ids)
+                resolved.append(name)
+
+        if not candidates:
+            tasks = repository.iter_tasks()
+        else:
+            candidates.sort(key=len)
+            ids = candidates[0].intersection(*candidates[1:])
+            if self._scan_cheaper(query, len(ids), len(repository)):
+                tasks = repository.iter_tasks(ids)
+            else:
+                tasks = repository.filter_tasks(task_ids=ids)
+        if STATS.enabled:
+            tasks = self._counted(tasks)
+        return query.filter(tasks, resolved)
 
+    @staticmethod
+    def _scan_cheaper(query: Query, candidates: int, total: int) -> bool:
+        """Дешевле ли перебрать задачи по порядку с проверкой принадлежности, чем отсортировать кандидатов."""
+        if query.ordering is not None: # Сортировке запроса нужны все кандидаты в порядке добавления (устойчивость при равных ключах)
+            return False
+        scanned = total if query.max_results is None else query.max_results * total // max(candidates, 1)
+        return scanned < candidates * candidates.bit_length()
+
+    @staticmethod
+    def _counted(tasks: Iterable[Task]) -> Iterator[Task]:
+        """Подсчет задач, которые запрос действительно просмотрел (счетчик записывается по окончании перебора)."""
+        seen = 0
+        try:
+            for task in tasks:
+                seen += 1
+                yield task
+        finally:
+            STATS.count("Поиск: просмотрено задач", seen)
+
+    @timed
+    def find(self, repository: TaskRepository, keyword: Optional[str], category: Optional[str], completed: Optional[bool]) -> list[Task]:
+        """Поиск по репозиторию по ключевому слову, категории и статусу (см. select)."""
+        return list(self.select(repository, Query.from_params(keyword, category, completed)))
+
+class IndexedTaskSearcher(TaskSearcher):
+    """Поиск по ключевому слову через полнотекстовый индекс (TextIndex), подключенный к репозиторию через attach."""
+    def __init__(self):
+        self.index = TextIndex()
+
+    def attach(self, repository: TaskRepository):
+        repository.attach_index(self.index)
+
+    def lookup(self, repository: TaskRepository, condition: str, value) -> Optional[set[int]]:
+        if condition == "keyword": # select вызывает lookup после окончания загрузки, когда индекс уже построен
+            return self.index.search(value)
+        return super().lookup(repository, condition, value)
+
+@instrumented
 class TaskManager:
     """Основной класс приложения. Все основные операции над объектами Task производятся здесь. Слой бизнес-логики (Service layer)."""
-    last_timestamp = None
-    counter = 0
 
-    def __init__(self, filename: str, searcher: TaskSearcher):
-        self.repository = TaskRepository(filename)
+    def __init__(self, filename: str, searcher: TaskSearcher, storage: Optional[JsonStorage] = None, background_load: bool = False,
+                 backend: Optional[str] = None, background_save: bool = False, shared: bool = False, cache_size: int = 128):
+        """backend - тип хранилища (по умолчанию по расширению), cache_size - размер кэша результатов (0 - без кэша)."""
+        self.repository = open_repository(filename, storage, background_load=background_load, backend=backend,
+                                          background_save=background_save, shared=shared)
         self.searcher = searcher
+        if isinstance(searcher, IndexedTaskSearcher):
+            searcher.attach(self.repository)
+        # Номер узла выдает хранилище: номера по PID у одновременно работающих процессов могут совпасть
+        self.ids = TaskIdAllocator(self.repository.max_task_id, self.repository.__contains__, node=self.repository.claim_node())
+        self.cache = ResultCache(cache_size) if cache_size else None
 
-    def generate_task_id(self) -> int:
-        """Создание уникальных ID для задач, используя временные меток (в секундах) и счетчик.
-        Для создания ID они конвертируются в число системы исчисления основой в 36."""
-        current_timestamp = int(time.time() * 1000)
-
-        if current_timestamp == TaskManager.last_timestamp:
-            TaskManager.counter += 1
-            if TaskManager.counter > 99: # Ограничиваем счетчик до числа двойной разрядности (0-99)
-                TaskManager.counter = 0
-            else:
-                TaskManager.last_timestamp = current_timestamp
-                TaskManager.counter = 0
-
-        combined_input = f"{current_timestamp}-{TaskManager.counter}".encode('utf-8')
+    def flush(self):
+        """Ожидание записи всех изменений на диск."""
+        self.repository.flush()
 
-        hash_object = hashlib.sha256(combined_input)
-        hex_dig = hash_object.hexdigest()
+    def close(self):
+        """Завершение работы с хранилищем задач."""
+        self.repository.close()
 
-        task_id = int(hex_dig[:8], 16)
-
-        return task_id
-
-    def add_task(self, title: str, *args, **kwargs):
-        """Добавление новой задачи. Принимает на вход название задачи и необязательные переменные."""
-        task_id = self.generate_task_id()
+    def generate_task_id(self) -> int:
+        """Создание уникального ID для задачи (см. TaskIdAllocator): монотонный номер и номер процесса,
+        с проверкой, что ID еще не занят."""
+        return self.ids.allocate()
+
+    def _new_task(self, title: str, task_id: Optional[int] = None, **kwargs) -> Task:
+        """Создание объекта Task из названия и необязательных полей (deadline - строка YYYY-MM-DD).
+        task_id - заранее выделенный ID, иначе выдается новый."""
+        task_id = task_id or self.generate_task_id()
         description = kwargs.get("description", None)
         category = kwargs.get("category", None)
         deadline_str = kwargs.get("deadline", None)
@@ -72,22 +132,106 @@ class TaskManager:
 
         deadline = datetime.strptime(deadline_str, "%Y-%m-%d") if deadline_str else None
 
-        new_task = Task(task_id, title, description, category, deadline, priority)
+        return Task(task_id, title, description, category, deadline, priority)
+
+    @timed
+    def add_task(self, title: str, *args, **kwargs) -> int:
+        """Добавление новой задачи. Принимает на вход название задачи и необязательные переменные. Возвращает ID задачи."""
+        new_task = self._new_task(title, **kwargs)
         
         self.repository.add_task(new_task)
-        print(f"Задача {title} добавлена c ID {task_id}.\n")
-
+        print(f"Задача {title} добавлена c ID {new_task.task_id}.\n")
+        return new_task.task_id
+
+    def batch(self):
+        """Пакет операций: with manager.batch(): ... Изменения сохраняются одной атомарной записью при выходе из блока,
+        а при исключении откатываются."""
+        return self.repository.batch()
+
+    @timed
+    def add_tasks(self, tasks: Iterable[dict]) -> list[int]:
+        """Массовое добавление задач. Каждый элемент - словарь с полями как у add_task (title обязателен). Возвращает ID задач."""
+        tasks = [dict(fields) for fields in tasks]
+        with self.batch():
+            task_ids = self.ids.allocate_many(len(tasks))
+            for fields, task_id in zip(tasks, task_ids):
+                self.repository.add_task(self._new_task(fields.pop("title"), task_id, **fields))
+        return task_ids
+
+    @timed
+    def delete_tasks(self, task_ids: Iterable[int]) -> int:
+        """Массовое удаление задач по ID. Возвращает число удаленных задач."""
+        with self.batch():
+            return sum(self.repository.delete_task(task_id) for task_id in task_ids)
+
+    @timed
+    def update_where(self, where: Union[Callable[[Task], bool], dict], changes: dict) -> int:
+        """Изменение всех задач, удовлетворяющих условию where, одним пакетом. Возвращает число измененных задач.
+        where - функция от задачи или словарь параметров search (keyword, category, completed)."""
+        matched = self.search(**where) if isinstance(where, dict) else [task for task in self.view_tasks() if where(task)]
+        with self.batch():
+            for task in matched:
+                self.repository.update_task(task.task_id, **changes)
+        return len(matched)
+
+    @timed
     def delete_task(self, task_id: int) -> bool:
         """Удаление задачи по ID."""
         return self.repository.delete_task(task_id)
 
+    @timed
     def view_tasks(self) -> list[Task]:
         """Просмотр всех задач."""
         return self.repository.view_tasks()
 
+    @timed
+    def view_page(self, offset: int, limit: int, order_by: Optional[str] = None) -> list[Task]:
+        """Страница списка задач (см. TaskRepository.view_page)."""
+        return self.repository.view_page(offset, limit, order_by)
+
+    def count_tasks(self) -> int:
+        """Общее число задач."""
+        return len(self.repository)
+
+    def _cached(self, query: Query, compute: Callable[[], list[Task]]) -> list[Task]:
+        """Результат запроса из кэша или вычисленный compute."""
+        if self.cache is None:
+            return compute()
+        revision = self.repository.revision # До вычисления: если данные изменятся во время него, запись привяжется к старой ревизии
+        task_ids = self.cache.get(query.key(), revision)
+        if task_ids is not None:
+            return self.repository.get_many(task_ids)
+        tasks = compute()
+        self.cache.put(query.key(), revision, [task.task_id for task in tasks])
+        return tasks
+
+    @timed
     def view_tasks_by_category(self, category: str) -> list[Task]:
-        return self.repository.get_tasks_by_category(category)
-
+        return self._cached(Query().category(category), lambda: self.repository.get_tasks_by_category(category))
+
+    @timed
+    def view_tasks_due_before(self, deadline: datetime) -> list[Task]:
+        """Задачи со сроком сдачи раньше указанной даты."""
+        return self.repository.get_tasks_due_before(deadline)
+
+    @timed
+    def search(self, keyword: Optional[str] = None, category: Optional[str] = None, completed: Optional[bool] = None) -> list[Task]:
+        """Поиск задач по ключевому слову, категории и статусу выполнения."""
+        searcher = self.searcher if self.searcher is not None else TaskSearcher()
+        return self._cached(Query.from_params(keyword, category, completed),
+                            lambda: searcher.find(self.repository, keyword=keyword, category=category, completed=completed))
+
+    @timed
+    def select(self, query: Query) -> list[Task]:
+        """Выполнение запроса Query: любые условия, сортировка и ограничение числа результатов."""
+        searcher = self.searcher if self.searcher is not None else TaskSearcher()
+        return self._cached(query, lambda: list(searcher.select(self.repository, query)))
+
+    def cache_stats(self) -> dict:
+        """Счетчики кэша результатов (см. ResultCache.stats); пустой словарь, если кэш отключен."""
+        return self.cache.stats() if self.cache is not None else {}
+
+    @timed
     def change_status(self, task_id: int, status: bool):
         """Изменение статуса задачи на выполненную или не выполненную."""
         try:
@@ -97,19 +241,14 @@ class TaskManager:
                 print(f'Задача уже имеет статус "{"Выполнена" if status else "Не выполнена"}".')
                 return
             
-            task.completed = status
-            self.repository.save_tasks()
+            self.repository.update_task(task_id, completed=status)
             print(f'Статус задачи "{task.title}" обновлен: "{"Выполнена" if status else "Не выполнена"}"')
         
         except NoResultFound as e:
             print(e)
 
+    @timed
     def edit_task(self, task_id: int, **kwargs):
         """Редактирование существующей задачи."""
-        task_to_edit = self.repository.get_task(task_id)
-
-        for key, value in kwargs.items():
-            if value is not None:
-                setattr(task_to_edit, key, value)
-        
-        self.repository.save_tasks()
+        changes = {key: value for key, value in kwargs.items() if value is not None}
+        self.repository.update_task(task_id, **changes)
@@ -0,0 +1,326 @@
+import json
+import sqlite3
+import weakref
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+from datetime import datetime
+
+from .model import Task, Priority
+from .columnar import TaskColumns
+from .indexes import fold
+from .utils import NoResultFound, DuplicateTaskError
+from .ids import NODE_MASK
+from .instrumentation import instrumented, timed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    description TEXT,
+    category TEXT,
+    deadline TEXT,
+    priority INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    title_key TEXT NOT NULL,
+    description_key TEXT,
+    category_key TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_category ON tasks (category_key, completed);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+CREATE INDEX IF NOT EXISTS tasks_deadline ON tasks (deadline) WHERE deadline IS NOT NULL;
+CREATE TABLE IF NOT EXISTS id_nodes (id INTEGER PRIMARY KEY CHECK (id = 0), node INTEGER NOT NULL);
+"""
+
+COLUMNS = "task_id, title, description, category, deadline, priority, completed"
+SELECT_TASKS = f"SELECT {COLUMNS} FROM tasks"
+INSERT_TASK = f"INSERT INTO tasks ({COLUMNS}, title_key, description_key, category_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+UPDATE_TASK = """UPDATE tasks SET title = ?, description = ?, category = ?, deadline = ?, priority = ?, completed = ?,
+    title_key = ?, description_key = ?, category_key = ? WHERE task_id = ?"""
+
+def task_row(task: Task) -> tuple:
+    """Строка таблицы tasks для задачи. Ключи *_key хранят текст в нижнем регистре:
+    встроенный lower() в SQLite работает только с ASCII, а нужен и кириллический текст."""
+    return (
+        task.task_id, task.title, task.description, task.category,
+        task.deadline.isoformat() if task.deadline else None,
+        int(task.priority_level), int(bool(task.completed)),
+        fold(task.title),
+        fold(task.description) if task.description else None,
+        fold(task.category) if task.category else None,
+    )
+
+QUERY_CLAUSES = { # Условие Query -> SQL; значения условий уже нормализованы (ключи *_key сравниваются со свернутым текстом)
+    "keyword": "(instr(title_key, ?) > 0 OR instr(description_key, ?) > 0)",
+    "title": "instr(title_key, ?) > 0",
+    "category": "category_key = ?",
+    "completed": "completed = ?",
+    "priority": "priority = ?",
+    "due_before": "deadline IS NOT NULL AND deadline < ?",
+    "due_after": "deadline IS NOT NULL AND deadline >= ?",
+}
+
+def query_param(value):
+    """Значение условия Query в виде параметра SQL."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return int(value) if isinstance(value, int) else value # bool и Priority хранятся числами
+
+ORDER_BY = {
+    None: "seq",
+    "priority": "priority DESC, seq",
+    "deadline": "deadline IS NULL, deadline, seq",
+    "status": "completed, seq",
+}
+
+@instrumented
+class SqliteTaskRepository:
+    """Репозиторий задач поверх SQLite (stdlib sqlite3, режим WAL). Слой доступа к данным (Data access layer).
+    Повторяет интерфейс TaskRepository, но фильтрация по категории, статусу, сроку и ключевому слову выполняется в SQL по индексам.
+    Для одной задачи возвращается один и тот же объект Task, пока на него есть ссылки (identity map).
+    Несколько процессов могут работать с базой одновременно: блокировки и изоляцию транзакций обеспечивает сам SQLite."""
+    runs_queries = True # Запросы Query целиком переводятся в SQL (см. select)
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        # Соединение можно использовать из нескольких потоков: SQLite собран в режиме serialized (sqlite3.threadsafety == 3)
+        self.connection = sqlite3.connect(filename, isolation_level=None, check_same_thread=sqlite3.threadsafety != 3)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._identity: weakref.WeakValueDictionary[int, Task] = weakref.WeakValueDictionary()
+        self._undo: Optional[list[tuple]] = None # Отмена изменений объектов Task текущего пакета (None - пакет не открыт)
+        self._revision = 0 # Счетчик изменений, сделанных через это соединение
+
+    def _task(self, row: tuple) -> Task:
+        task = self._identity.get(row[0])
+        if task is None:
+            task = Task(row[0], row[1], row[2], row[3], row[4], row[5], bool(row[6]))
+            self._identity[task.task_id] = task
+        else: # Строку мог изменить другой процесс: объект из identity map обновляется по базе
+            task.title, task.description, task.category, task.deadline, task.priority = row[1:6]
+            task.completed = bool(row[6])
+        return task
+
+    def _select(self, where: str = "", params: Iterable = (), order_by: str = "seq") -> list[Task]:
+        rows = self.connection.execute(f"{SELECT_TASKS} {where} ORDER BY {order_by}", tuple(params))
+        return [self._task(row) for row in rows]
+
+    @property
+    def tasks(self) -> list[Task]:
+        """Список всех задач в порядке добавления."""
+        return self._select()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def __contains__(self, task_id: int) -> bool:
+        return self.connection.execute("SELECT 1 FROM tasks WHERE task_id = ?", (task_id,)).fetchone() is not None
+
+    def max_task_id(self) -> int:
+        """Наибольший ID среди задач (0, если задач нет)."""
+        return self.connection.execute("SELECT COALESCE(MAX(task_id), 0) FROM tasks").fetchone()[0]
+
+    def claim_node(self) -> int:
+        """Номер узла для TaskIdAllocator, уникальный среди соединений с базой (повторяется только через 1024 запуска):
+        счетчик в таблице id_nodes увеличивается одной атомарной командой."""
+        return self.connection.execute(
+            f"INSERT INTO id_nodes VALUES (0, 0) ON CONFLICT (id) DO UPDATE SET node = (node + 1) & {NODE_MASK} RETURNING node"
+        ).fetchone()[0]
+
+    def wait_loaded(self):
+        pass
+
+    @property
+    def revision(self) -> tuple[int, int]:
+        """Ревизия данных: счетчик своих изменений и PRAGMA data_version, который меняется,
+        когда изменения фиксирует другое соединение (другой процесс)."""
+        return self._revision, self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self) -> bool:
+        """Каждый запрос читает актуальное состояние базы, подхватывать нечего."""
+        return False
+
+    def load_tasks(self):
+        """Данные читаются из базы по запросу, предварительная загрузка не нужна."""
+
+    def save_tasks(self):
+        """Каждое изменение фиксируется в базе сразу, отдельное сохранение не требуется."""
+
+    def flush(self):
+        """Каждое изменение фиксируется в базе сразу, ждать нечего."""
+
+    def close(self):
+        self.connection.close()
+
+    def attach_index(self, index):
+        """Индексы в памяти не нужны: поиск выполняется в SQL."""
+
+    @contextmanager
+    def batch(self):
+        """Пакет изменений в одной транзакции SQLite. При исключении транзакция откатывается,
+        а измененные объекты Task возвращаются к прежним значениям. Вложенные пакеты входят во внешний."""
+        if self._undo is not None:
+            yield self
+            return
+
+        self._undo = []
+        self.connection.execute("BEGIN")
+        try:
+            yield self
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            self._revision += 1
+            for action, task, data in reversed(self._undo):
+                if action == "add":
+                    self._identity.pop(task.task_id, None)
+                elif action == "delete":
+                    self._identity[task.task_id] = task
+                else:
+                    for key, value in data.items():
+                        setattr(task, key, value)
+            raise
+        finally:
+            self._undo = None
+
+    @timed
+    def add_task(self, new_task: Task):
+        """Добавление новой задачи (транзакция). Если ID уже занят, то выбрасывает DuplicateTaskError."""
+        try:
+            self.connection.execute(INSERT_TASK, task_row(new_task))
+        except sqlite3.IntegrityError:
+            raise DuplicateTaskError(new_task.task_id) from None
+        self._identity[new_task.task_id] = new_task
+        self._revision += 1
+        if self._undo is not None:
+            self._undo.append(("add", new_task, None))
+
+    @timed
+    def add_tasks(self, tasks: Iterable[Task]):
+        """Добавление множества задач одной транзакцией."""
+        with self.batch():
+            for task in tasks:
+                self.add_task(task)
+
+    @timed
+    def update_task(self, task_id: int, **changes) -> Task:
+        """Изменение полей задачи по ID (транзакция). Если задача не найдена, то выбрасывает NoResultFound."""
+        task = self.get_task(task_id)
+        if "priority" in changes:
+            changes["priority"] = Priority.parse(changes["priority"]).label
+        if self._undo is not None:
+            self._undo.append(("update", task, {key: getattr(task, key) for key in changes}))
+        for key, value in changes.items():
+            setattr(task, key, value)
+
+        row = task_row(task)
+        self.connection.execute(UPDATE_TASK, (*row[1:], task_id))
+        self._revision += 1
+        return task
+
+    @timed
+    def delete_task(self, task_id: int) -> bool:
+        """Удаление задачи по ID (транзакция)."""
+        deleted = self.connection.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,)).rowcount
+        self._revision += deleted
+        task = self._identity.pop(task_id, None)
+        if self._undo is not None and task is not None:
+            self._undo.append(("delete", task, None))
+        return deleted > 0
+
+    @timed
+    def get_task(self, task_id: int) -> Task:
+        """Получение задачи по ID. Если задача не найдена, то выбрасывает NoResultFound."""
+        tasks = self._select("WHERE task_id = ?", (task_id,))
+        if not tasks:
+            raise NoResultFound(task_id)
+        return tasks[0]
+
+    @timed
+    def get_many(self, task_ids: Iterable[int]) -> list[Task]:
+        """Задачи по списку ID в порядке списка (отсутствующие ID пропускаются), одним запросом."""
+        task_ids = list(task_ids)
+        found = {task.task_id: task for task in self._select("WHERE task_id IN (SELECT value FROM json_each(?))", (json.dumps(task_ids),))}
+        return [found[task_id] for task_id in task_ids if task_id in found]
+
+    @timed
+    def get_tasks_by_category(self, category: str) -> list[Task]:
+        """Получить список задач по категории"""
+        return self._select("WHERE category_key = ?", (fold(category),))
+
+    @timed
+    def get_tasks_due_before(self, deadline: datetime) -> list[Task]:
+        """Задачи со сроком сдачи раньше deadline, по возрастанию срока."""
+        return self._select("WHERE deadline IS NOT NULL AND deadline < ?", (deadline.isoformat(),), order_by="deadline, seq")
+
+    @timed
+    def filter_tasks(self, category: Optional[str] = None, completed: Optional[bool] = None,
+                     task_ids: Optional[set[int]] = None, keyword: Optional[str] = None) -> list[Task]:
+        """Отбор задач по категории, статусу и подстроке в названии/описании одним SQL-запросом."""
+        clauses, params = [], []
+        if keyword:
+            clauses.append("(instr(title_key, ?) > 0 OR instr(description_key, ?) > 0)")
+            params += [fold(keyword)] * 2
+        if category:
+            clauses.append("category_key = ?")
+            params.append(fold(category))
+        if completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(bool(completed)))
+        if task_ids is not None:
+            clauses.append("task_id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(task_ids)))
+
+        return self._select(f"WHERE {' AND '.join(clauses)}" if clauses else "", params)
+
+    def view_tasks(self) -> list[Task]:
+        """Возвращает список всех задач."""
+        return self.tasks
+
+    @timed
+    def view_page(self, offset: int, limit: int, order_by: Optional[str] = None) -> list[Task]:
+        """Срез задач [offset, offset + limit) через LIMIT/OFFSET, сортировка выполняется в SQL."""
+        rows = self.connection.execute(f"{SELECT_TASKS} ORDER BY {ORDER_BY[order_by]} LIMIT ? OFFSET ?", (limit, offset))
+        return [self._task(row) for row in rows]
+
+    def lookup(self, condition: str, value) -> Optional[set[int]]:
+        """Индексы использует сам SQLite при выполнении select."""
+        return None
+
+    @timed
+    def select(self, query) -> Iterator[Task]:
+        """Выполнение запроса Query одним SQL-запросом: условия, ORDER BY и LIMIT. Строки читаются из курсора по мере перебора."""
+        clauses, params = [], []
+        for name, value in query.conditions.items():
+            clause = QUERY_CLAUSES[name]
+            clauses.append(clause)
+            params += [query_param(value)] * clause.count("?")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit = -1 if query.max_results is None else query.max_results
+        rows = self.connection.execute(f"{SELECT_TASKS} {where} ORDER BY {ORDER_BY[query.ordering]} LIMIT ?", (*params, limit))
+        return (self._task(row) for row in rows)
+
+    def columns(self) -> TaskColumns:
+        """Колоночное представление всех задач."""
+        return TaskColumns.from_tasks(self.tasks)
+
+    @timed
+    def bulk_filter(self, category: Optional[str] = None, completed: Optional[bool] = None,
+                    priority: Optional[Priority] = None, due_before: Optional[datetime] = None) -> list[Task]:
+        """Массовая фильтрация по нескольким полям в SQL."""
+        clauses, params = [], []
+        if category:
+            clauses.append("category_key = ?")
+            params.append(fold(category))
+        if completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(bool(completed)))
+        if priority is not None:
+            clauses.append("priority = ?")
+            params.append(int(Priority.parse(priority)))
+        if due_before is not None:
+            clauses.append("deadline IS NOT NULL AND deadline < ?")
+            params.append(due_before.isoformat())
+
+        return self._select(f"WHERE {' AND '.join(clauses)}" if clauses else "", params)
@@ -0,0 +1,428 @@
+import os
+import re
+import json
+import threading
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from typing import Iterable, Iterator, Optional, TextIO
+from datetime import datetime
+
+from .model import Task
+from .utils import StaleDataError
+from .locking import FileLock
+from .instrumentation import instrumented, timed, STATS
+
+@contextmanager
+def atomic_open(filename: str, binary: bool = False) -> Iterator[TextIO]:
+    """Запись файла целиком через временный файл, fsync и атомарное переименование.
+    При сбое посреди записи на диске остается либо старая, либо новая версия файла. binary=True - файл открывается в режиме "wb"."""
+    tmp_filename = f"{filename}.tmp"
+    try:
+        with (open(tmp_filename, "wb") if binary else open(tmp_filename, "w", encoding="utf-8")) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_filename, filename)
+        if STATS.enabled:
+            STATS.count("Запись файла: байт", os.path.getsize(filename))
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+def write_json_array(file: TextIO, items: Iterable[dict], chunk: int = 10_000):
+    """Запись JSON-массива порциями. json.dump кодирует поток чистым Python, а encode порции идет через C-кодировщик
+    (в несколько раз быстрее), при этом весь текст файла в памяти не собирается."""
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    items = iter(items)
+    separator = "["
+    while batch := list(islice(items, chunk)):
+        file.write(separator + ",".join(map(encode, batch)))
+        separator = ","
+    file.write("[]" if separator == "[" else "]")
+
+def serialize_changes(changes: dict) -> dict:
+    """Приведение изменяемых полей задачи к виду, пригодному для JSON."""
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in changes.items()}
+
+def deserialize_changes(changes: dict) -> dict:
+    """Обратное преобразование к serialize_changes."""
+    changes = dict(changes)
+    if changes.get("deadline"):
+        changes["deadline"] = datetime.fromisoformat(changes["deadline"])
+    return changes
+
+def file_version(filename: str) -> Optional[tuple[int, int, int]]:
+    """Дешевая метка версии файла без чтения содержимого: (inode, mtime в нс, размер), None - файла нет.
+    Атомарная замена файла меняет inode, дописывание - размер, поэтому любая запись меняет метку."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def iter_entry_ops(entry: dict) -> Iterator[tuple]:
+    """Разворачивание записи журнала (в том числе пакета) в операции ("add", Task), ("delete", task_id)
+    или ("edit", task_id, changes)."""
+    op = entry["op"]
+    if op == "batch":
+        for nested in entry["ops"]:
+            yield from iter_entry_ops(nested)
+    elif op == "add":
+        yield "add", Task.from_dict(entry["task"])
+    elif op == "delete":
+        yield "delete", entry["task_id"]
+    else:
+        yield "edit", entry["task_id"], {"completed": entry["completed"]} if op == "status" else deserialize_changes(entry["changes"])
+
+SEPARATORS = re.compile(r"[\s,]*")
+
+def iter_json_array(file: TextIO, chunk_chars: int = 1 << 20) -> Iterator[dict]:
+    """Потоковый разбор JSON-массива объектов. Файл читается блоками по chunk_chars символов,
+    в памяти одновременно находятся только текущий блок и текущий объект."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_chars).lstrip()
+    if not buffer:
+        return
+    if not buffer.startswith("["):
+        raise ValueError(f"Ожидался JSON-массив задач в {file.name}.")
+
+    pos = 1
+    while True:
+        pos = SEPARATORS.match(buffer, pos).end()
+        if pos == len(buffer):
+            more = file.read(chunk_chars)
+            if not more:
+                raise ValueError(f"Неожиданный конец файла {file.name}.")
+            buffer, pos = more, 0
+            continue
+        if buffer[pos] == "]":
+            return
+
+        try:
+            data, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            more = file.read(chunk_chars) # Объект разрезан границей блока: дочитываем и пробуем снова
+            if not more:
+                raise
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield data
+
+@instrumented
+class JsonStorage:
+    """Хранилище по умолчанию: весь список задач в одном JSON-файле.
+    Любое изменение перезаписывает файл целиком."""
+    needs_ops = False # record и record_batch получают описания операций (иначе - None и пустой список)
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def load(self) -> Iterator[Task]:
+        """Потоковая загрузка задач из файла JSON: задачи создаются по мере разбора файла."""
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, "r", encoding="utf-8") as file:
+            for data in iter_json_array(file):
+                yield Task.from_dict(data)
+
+    def version(self) -> Optional[tuple]:
+        """Метка версии данных на диске (см. file_version)."""
+        return file_version(self.filename)
+
+    def changes_since(self, version: Optional[tuple]) -> Optional[list[dict]]:
+        """Записи об изменениях с версии version. JSON-файл перезаписывается целиком, поэтому только None - перечитать все."""
+        return None
+
+    def open_snapshot(self):
+        """Снимок, задачи которого можно декодировать по требованию (см. BinaryStorage). У JSON-файла его нет."""
+        return None
+
+    @timed
+    def save(self, tasks: Iterable[Task]):
+        """Сохранение всех задач в файл JSON (атомарная замена файла)."""
+        with atomic_open(self.filename) as file:
+            write_json_array(file, (task.to_dict() for task in tasks))
+
+    def record(self, op: str, payload: dict, tasks: Iterable[Task]):
+        """Фиксация операции над задачами. Для JSON-файла это полная перезапись."""
+        self.save(tasks)
+
+    def record_batch(self, ops: list[tuple[str, dict]], tasks: Iterable[Task]):
+        """Фиксация пакета операций одной перезаписью файла."""
+        self.save(tasks)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+@instrumented
+class BackgroundJsonStorage(JsonStorage):
+    """JSON-хранилище, которое пишет файл в фоновом потоке.
+
+    save снимает копию задач (to_dict) и сразу возвращает управление. Поток-писатель берет только самый свежий снимок,
+    поэтому серия изменений подряд превращается в одну запись. Запись атомарная (временный файл, fsync, rename).
+    Рядом с файлом хранится счетчик поколений (<файл>.gen). Хранилище помнит поколение, на котором основаны его данные,
+    и пишет файл, только если на диске все еще оно (сравнение с заменой под блокировкой файла, если есть fcntl).
+    Иначе файл изменен другим процессом: хранилище становится устаревшим, а flush и следующий save
+    выбрасывают StaleDataError. После close запись синхронная."""
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self.generation_filename = f"{filename}.gen"
+        self._base = self.disk_generation() # Поколение на диске, на котором основаны данные в памяти
+        self._pending: Optional[list[dict]] = None
+        self._writing = False
+        self._closed = False
+        self._error: Optional[Exception] = None
+        self._stale = False
+        try:
+            self._file_lock: Optional[FileLock] = FileLock(filename)
+        except RuntimeError: # Нет fcntl: процессы не согласуются, остается только проверка поколения
+            self._file_lock = None
+        self._condition = threading.Condition()
+        self._writer = threading.Thread(target=self._run, name="ttdm-writer", daemon=True)
+        self._writer.start()
+
+    def _locked(self, shared: bool = False):
+        return self._file_lock.hold(shared) if self._file_lock is not None else nullcontext()
+
+    def disk_generation(self) -> int:
+        """Поколение данных, записанных на диск (0, если файла поколений еще нет)."""
+        try:
+            with open(self.generation_filename, "r", encoding="utf-8") as file:
+                return int(file.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def load(self) -> Iterator[Task]:
+        """Загрузка задач (см. JsonStorage.load) с запоминанием поколения, которому они соответствуют."""
+        with self._locked(shared=True):
+            self._base = self.disk_generation()
+            yield from super().load()
+
+    def save(self, tasks: Iterable[Task]):
+        """Передача снимка задач потоку-писателю. Если хранилище устарело, выбрасывает StaleDataError."""
+        if self._stale:
+            raise StaleDataError(self.filename)
+        snapshot = [task.to_dict() for task in tasks]
+        with self._condition:
+            if self._closed: # Потока-писателя уже нет
+                self._write(snapshot)
+                return
+            self._pending = snapshot # Более старый незаписанный снимок просто заменяется
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._writing = True
+
+            error = None
+            try:
+                self._write(snapshot)
+            except Exception as e:
+                error = e
+
+            with self._condition:
+                self._writing = False
+                self._error = self._error or error
+                self._condition.notify_all()
+
+    @timed
+    def _write(self, snapshot: list[dict]):
+        with self._locked():
+            if self._stale or self.disk_generation() != self._base:
+                self._stale = True
+                raise StaleDataError(self.filename)
+            with atomic_open(self.filename) as file:
+                write_json_array(file, snapshot)
+            with atomic_open(self.generation_filename) as file:
+                file.write(str(self._base + 1))
+            self._base += 1
+
+    @timed
+    def flush(self):
+        """Ожидание записи всех переданных снимков. Ошибка записи пробрасывается здесь, StaleDataError - при каждом вызове
+        после того, как хранилище устарело."""
+        with self._condition:
+            while self._pending is not None or self._writing:
+                self._condition.wait()
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+        if self._stale:
+            raise StaleDataError(self.filename)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join()
+        self.flush()
+
+@instrumented
+class JournalStorage:
+    """Журнальное хранилище: снимок задач (JSON) и append-only журнал операций рядом с ним.
+
+    Каждое изменение дописывается в журнал одной строкой (add/edit/status/delete), fsync выполняется
+    пачками раз в fsync_every операций. После compact_after операций журнал сворачивается в новый снимок.
+    При загрузке снимок читается целиком, а затем поверх него проигрывается журнал.
+    Все операции идемпотентны, поэтому повторное проигрывание журнала после сбоя во время компактификации безопасно."""
+    needs_ops = True
+
+    def __init__(self, filename: str, fsync_every: int = 64, compact_after: int = 10_000):
+        self.filename = filename
+        self.journal_filename = f"{filename}.journal"
+        self.fsync_every = fsync_every
+        self.compact_after = compact_after
+        self._journal = None
+        self._unsynced = 0
+        self._journal_ops = 0
+
+    @classmethod
+    def import_json(cls, json_filename: str, filename: str, **kwargs) -> "JournalStorage":
+        """Перенос задач из обычного JSON-файла в журнальное хранилище (создается новый снимок)."""
+        storage = cls(filename, **kwargs)
+        storage.save(JsonStorage(json_filename).load())
+        return storage
+
+    @timed
+    def load(self) -> list[Task]:
+        """Загрузка снимка и проигрывание журнала поверх него."""
+        tasks = {task.task_id: task for task in JsonStorage(self.filename).load()}
+        self._journal_ops = 0
+
+        if os.path.exists(self.journal_filename):
+            for entry in self._read_entries(0):
+                self._replay(tasks, entry)
+                self._journal_ops += 1
+
+        return list(tasks.values())
+
+    def _read_entries(self, offset: int) -> list[dict]:
+        """Записи журнала начиная с offset. Недописанная строка после сбоя и все за ней (это не было подтверждено)
+        обрезаются в файле: иначе новые записи легли бы после нее и терялись бы при каждой следующей загрузке."""
+        entries = []
+        with open(self.journal_filename, "rb+") as file:
+            file.seek(offset)
+            valid, line = offset, b"\n"
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError: # JSONDecodeError или обрезанный посреди символа UTF-8
+                    break
+                valid += len(line)
+            else:
+                if line.endswith(b"\n"):
+                    return entries
+                file.write(b"\n") # Запись цела, не дописан только перевод строки
+                valid += 1
+            file.truncate(valid)
+            file.flush()
+            os.fsync(file.fileno())
+        return entries
+
+    @staticmethod
+    def _replay(tasks: dict, entry: dict):
+        """Применение одной записи журнала к словарю задач."""
+        for op, *args in iter_entry_ops(entry):
+            if op == "add":
+                tasks[args[0].task_id] = args[0]
+            elif op == "delete":
+                tasks.pop(args[0], None)
+            elif args[0] in tasks:
+                for key, value in args[1].items():
+                    setattr(tasks[args[0]], key, value)
+
+    def version(self) -> Optional[tuple]:
+        """Метка версии: метка снимка и размер журнала (журнал только дописывается до компактификации)."""
+        journal = file_version(self.journal_filename)
+        return file_version(self.filename), journal[2] if journal else 0
+
+    def changes_since(self, version: Optional[tuple]) -> Optional[list[dict]]:
+        """Записи журнала, дописанные после версии version, без повторного чтения снимка.
+        None, если снимок с тех пор заменен (компактификация) и данные нужно перечитать целиком."""
+        if version is None:
+            return None
+        snapshot, offset = version
+        current_snapshot, size = self.version()
+        if current_snapshot != snapshot or size < offset:
+            return None
+        if size == offset:
+            return []
+
+        entries = self._read_entries(offset)
+        self._journal_ops += len(entries)
+        return entries
+
+    def open_snapshot(self):
+        return None
+
+    @timed
+    def save(self, tasks: Iterable[Task]):
+        """Компактификация: запись нового снимка и очистка журнала."""
+        with atomic_open(self.filename) as file:
+            write_json_array(file, (task.to_dict() for task in tasks))
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_filename, "w", encoding="utf-8") as file:
+            os.fsync(file.fileno())
+        self._unsynced = 0
+        self._journal_ops = 0
+
+    @staticmethod
+    def _entry(op: str, payload: dict) -> dict:
+        entry = {"op": op, **payload}
+        if "changes" in entry:
+            entry["changes"] = serialize_changes(entry["changes"])
+        return entry
+
+    @timed
+    def record(self, op: str, payload: dict, tasks: Iterable[Task]):
+        """Дописывание операции в журнал."""
+        self._append(self._entry(op, payload), 1, tasks)
+
+    @timed
+    def record_batch(self, ops: list[tuple[str, dict]], tasks: Iterable[Task]):
+        """Дописывание пакета операций одной строкой журнала: недописанная строка отбрасывается при загрузке целиком,
+        поэтому пакет применяется либо полностью, либо никак."""
+        self._append({"op": "batch", "ops": [self._entry(op, payload) for op, payload in ops]}, len(ops), tasks)
+
+    def _append(self, entry: dict, op_count: int, tasks: Iterable[Task]):
+        if self._journal is None:
+            self._journal = open(self.journal_filename, "a", encoding="utf-8")
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        self._journal.write(line)
+        if STATS.enabled:
+            STATS.count("Запись в журнал: байт", len(line.encode("utf-8")))
+        self._journal.flush()
+        self._unsynced += op_count
+        self._journal_ops += op_count
+
+        if self._journal_ops >= self.compact_after:
+            self.save(tasks)
+        elif self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def flush(self):
+        self.sync()
+
+    @timed
+    def sync(self):
+        """Принудительный сброс журнала на диск."""
+        if self._journal is not None and self._unsynced:
+            os.fsync(self._journal.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        self.sync()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
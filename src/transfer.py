@@ -0,0 +1,228 @@
+"""Импорт и экспорт задач в JSON Lines (.jsonl) и CSV (.csv).
+
+Файлы читаются и пишутся потоком, порциями по chunk_size записей, поэтому дамп целиком в памяти не держится.
+При импорте разбор и проверка записей (срок, приоритет, InputValidator) выполняются в пуле процессов, а задачи
+добавляются одним пакетом репозитория (одна запись в хранилище или одна транзакция SQLite). Записи с уже существующим ID
+(в хранилище или выше в файле) пропускаются, записи без ID получают новый ID, некорректные записи пропускаются с сообщением.
+
+Запуск: python -m src.transfer import tasks.json dump.jsonl [--workers 4] [--chunk 10000] [--format csv] [--backend sqlite]
+        python -m src.transfer export tasks.json dump.csv"""
+import os
+import csv
+import sys
+import json
+import argparse
+import multiprocessing
+from time import perf_counter
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+from collections import deque
+from datetime import datetime, timezone
+
+from .ids import TaskIdAllocator
+from .model import Task, Priority
+from .storage import atomic_open
+from .repository import open_repository, BACKENDS
+from .utils import DuplicateTaskError, InputValidator, ValidationError
+
+FORMATS = ("jsonl", "csv")
+FIELDS = ("task_id", "title", "description", "category", "deadline", "priority", "completed")
+TRUE = frozenset({"true", "1", "yes", "да"})
+FALSE = frozenset({"false", "0", "no", "нет", ""})
+MAX_ERRORS = 100 # Сколько сообщений о некорректных записях сохраняется в отчете
+
+def detect_format(filename: str) -> str:
+    """Формат файла по расширению: .csv - CSV, иначе JSON Lines."""
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+def parse_record(data: Any) -> tuple:
+    """Проверка и приведение одной записи к кортежу полей Task (ID может быть None). Вызывает ValidationError.
+    Пустые строки CSV означают отсутствие значения."""
+    if not isinstance(data, dict):
+        raise ValidationError("Запись должна быть объектом с полями задачи.")
+    title = data.get("title")
+    InputValidator.validate_not_empty(title, "Название")
+    if not isinstance(title, str):
+        raise ValidationError("Название должно быть строкой.")
+
+    task_id = data.get("task_id")
+    if task_id in (None, ""):
+        task_id = None
+    else:
+        try:
+            task_id = int(task_id)
+        except (TypeError, ValueError):
+            raise ValidationError(f"Некорректный ID: {task_id}.") from None
+        if task_id <= 0 or isinstance(data["task_id"], (bool, float)):
+            raise ValidationError(f"Некорректный ID: {data['task_id']}.")
+
+    description, category = data.get("description") or None, data.get("category") or None
+    if not isinstance(description, (str, type(None))) or not isinstance(category, (str, type(None))):
+        raise ValidationError("Описание и категория должны быть строками.")
+
+    deadline = data.get("deadline") or None
+    if deadline is not None:
+        try:
+            deadline = datetime.fromisoformat(deadline)
+        except (TypeError, ValueError):
+            raise ValidationError(f"Некорректный срок сдачи: {deadline}. Ожидается дата ISO (YYYY-MM-DD).") from None
+        if deadline.tzinfo is not None: # В хранилище сроки без часового пояса: приводим к UTC, как binary.deadline_micros
+            deadline = deadline.astimezone(timezone.utc).replace(tzinfo=None)
+
+    try:
+        priority = int(Priority.parse(data.get("priority") or Priority.LOW))
+    except (TypeError, ValueError): # Число вне диапазона Priority или значение другого типа
+        raise ValidationError(f"Неизвестный приоритет: {data.get('priority')}.") from None
+
+    completed = data.get("completed")
+    if isinstance(completed, str):
+        value = completed.strip().lower()
+        if value not in TRUE and value not in FALSE:
+            raise ValidationError(f"Некорректный статус: {completed}.")
+        completed = value in TRUE
+    elif not isinstance(completed, (bool, type(None))):
+        raise ValidationError(f"Некорректный статус: {completed}.")
+    return task_id, title, description, category, deadline, priority, bool(completed)
+
+def parse_chunk(chunk: tuple) -> tuple[list[tuple], list[tuple[int, str]], int]:
+    """Разбор порции записей (выполняется в процессе пула). chunk - (формат, заголовок CSV, номер первой записи, строки).
+    Возвращает корректные записи, ошибки (номер записи, сообщение) и размер порции."""
+    format, header, first, rows = chunk
+    records, errors = [], []
+    for number, row in enumerate(rows, first):
+        try:
+            if format == "jsonl":
+                try:
+                    data = json.loads(row)
+                except json.JSONDecodeError as e:
+                    raise ValidationError(f"Некорректный JSON: {e}.") from None
+            else:
+                data = dict(zip(header, row))
+            records.append(parse_record(data))
+        except ValidationError as e:
+            errors.append((number, str(e)))
+    return records, errors, len(rows)
+
+def read_chunks(filename: str, format: str, chunk_size: int) -> Iterator[tuple]:
+    """Поток порций для parse_chunk. Строки JSON Lines передаются в пул как есть (их разбирают процессы пула),
+    а CSV разбивается на поля здесь: в CSV перевод строки может быть внутри значения."""
+    with open(filename, "r", encoding="utf-8", newline="") as file:
+        if format == "jsonl":
+            rows = (line for line in file if line.strip())
+            header = None
+        else:
+            rows = csv.reader(file)
+            header = [name.strip() for name in next(rows, [])]
+        first = 1
+        while chunk := list(islice(rows, chunk_size)):
+            yield format, header, first, chunk
+            first += len(chunk)
+
+def parse_parallel(chunks: Iterable[tuple], workers: int) -> Iterator[tuple]:
+    """Результаты parse_chunk в порядке порций. В пуле одновременно не больше 2 * workers порций:
+    Pool.imap вычитал бы весь файл в память без ограничения, если вставка отстает от разбора."""
+    with multiprocessing.Pool(workers) as pool:
+        window = deque()
+        for chunk in chunks:
+            window.append(pool.apply_async(parse_chunk, (chunk,)))
+            if len(window) >= 2 * workers:
+                yield window.popleft().get()
+        while window:
+            yield window.popleft().get()
+
+def import_tasks(repository, filename: str, format: Optional[str] = None, workers: Optional[int] = None, chunk_size: int = 10_000,
+                 progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """Импорт задач из файла одним пакетом репозитория. workers - число процессов разбора (по умолчанию - по числу ядер,
+    1 - без пула). progress(report) вызывается после каждой порции.
+
+    Возвращает отчет: processed (прочитано записей), imported, duplicates, invalid, errors (первые MAX_ERRORS ошибок)."""
+    format = format or detect_format(filename)
+    if format not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {format}.")
+    workers = workers or os.cpu_count() or 1
+    report = {"processed": 0, "imported": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    ids = TaskIdAllocator(repository.max_task_id, repository.__contains__, node=repository.claim_node())
+
+    chunks = read_chunks(filename, format, chunk_size)
+    # Порядок порций сохраняется, поэтому из записей с одинаковым ID остается первая в файле
+    results = parse_parallel(chunks, workers) if workers > 1 else map(parse_chunk, chunks)
+    try:
+        with repository.batch():
+            for records, errors, size in results:
+                new_ids = iter(ids.allocate_many(sum(record[0] is None for record in records)))
+                for task_id, *fields in records:
+                    try:
+                        repository.add_task(Task(task_id or next(new_ids), *fields))
+                    except DuplicateTaskError:
+                        report["duplicates"] += 1
+                    else:
+                        report["imported"] += 1
+                report["processed"] += size
+                report["invalid"] += len(errors)
+                report["errors"].extend(errors[:MAX_ERRORS - len(report["errors"])])
+                if progress is not None:
+                    progress(report)
+    finally:
+        if workers > 1:
+            results.close() # Останавливает пул, если импорт прерван
+        chunks.close()
+    return report
+
+def export_tasks(tasks: Iterable[Task], filename: str, format: Optional[str] = None, chunk_size: int = 10_000,
+                 progress: Optional[Callable[[int], None]] = None) -> int:
+    """Экспорт задач в файл (атомарная замена) порциями по chunk_size. progress(записано) вызывается после каждой порции.
+    Возвращает число записанных задач.
+
+    Экспорт выполняется в одном процессе: сериализация задач стоит примерно столько же, сколько их передача в пул."""
+    format = format or detect_format(filename)
+    if format not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {format}.")
+    count = 0
+    tasks = iter(tasks)
+    with atomic_open(filename) as file:
+        if format == "csv":
+            writer = csv.writer(file, lineterminator="\n")
+            writer.writerow(FIELDS)
+        else:
+            encode = json.JSONEncoder(ensure_ascii=False).encode
+        while chunk := list(islice(tasks, chunk_size)):
+            if format == "csv":
+                writer.writerows([("" if value is None else str(value).lower() if isinstance(value, bool) else value
+                                   for value in task.to_dict().values()) for task in chunk])
+            else:
+                file.write("\n".join(encode(task.to_dict()) for task in chunk) + "\n")
+            count += len(chunk)
+            if progress is not None:
+                progress(count)
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Импорт и экспорт задач TTDM в JSON Lines и CSV.")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("tasks", help="хранилище задач")
+    parser.add_argument("dump", help="файл .jsonl или .csv")
+    parser.add_argument("--format", choices=FORMATS, help="формат файла (по умолчанию - по расширению)")
+    parser.add_argument("--backend", choices=BACKENDS, help="хранилище (по умолчанию - по расширению)")
+    parser.add_argument("--workers", type=int, help="процессов разбора при импорте (по умолчанию - по числу ядер)")
+    parser.add_argument("--chunk", type=int, default=10_000, help="записей в порции")
+    args = parser.parse_args()
+
+    started = perf_counter()
+    def show(done: int):
+        print(f"\rОбработано записей: {done} ({done / (perf_counter() - started):.0f} в секунду)", end="", file=sys.stderr, flush=True)
+
+    repository = open_repository(args.tasks, backend=args.backend)
+    try:
+        if args.command == "import":
+            report = import_tasks(repository, args.dump, args.format, args.workers, args.chunk, lambda report: show(report["processed"]))
+            print(file=sys.stderr)
+            print(f"Импортировано задач: {report['imported']}, пропущено дубликатов: {report['duplicates']},"
+                  f" некорректных записей: {report['invalid']}.")
+            for number, message in report["errors"]:
+                print(f"Запись {number}: {message}")
+        else:
+            count = export_tasks(repository.tasks, args.dump, args.format, args.chunk, show)
+            print(file=sys.stderr)
+            print(f"Экспортировано задач: {count}.")
+    finally:
+        repository.close()
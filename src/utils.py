@@ -4,6 +4,18 @@ class NoResultFound(Exception):
         super().__init__(f"Задача с ID {task_id} не найдена.")
         self.task_id = task_id
 
+class DuplicateTaskError(Exception):
+    """Исключение, если задача с таким ID уже есть в хранилище."""
+    def __init__(self, task_id: int):
+        super().__init__(f"Задача с ID {task_id} уже существует.")
+        self.task_id = task_id
+
+class StaleDataError(Exception):
+    """Исключение, если данные в хранилище новее, чем те, которые пытаются записать."""
+    def __init__(self, filename: str):
+        super().__init__(f"Файл {filename} изменен другим процессом, запись устаревших данных отменена.")
+        self.filename = filename
+
 class ValidationError(Exception):
     """Кастомный класс для обработки ошибок валидации."""
     def __init__(self, message):
@@ -0,0 +1,87 @@
+import multiprocessing
+
+import pytest
+
+from src.model import Task
+from src.repository import open_repository
+from src.services import TaskManager
+
+WORKERS = 4
+TASKS_PER_WORKER = 30
+
+def hammer(filename: str, backend: str, worker: int) -> tuple[list[int], list[int], list[int], list[int]]:
+    """Процесс-писатель: добавляет задачи, переименовывает каждую четвертую, отмечает каждую вторую выполненной
+    и удаляет каждую третью. Возвращает ID оставшихся, выполненных, удаленных и переименованных задач."""
+    manager = TaskManager(filename, None, backend=backend, shared=True)
+    kept, completed, deleted, edited = [], [], [], []
+    for i in range(TASKS_PER_WORKER):
+        task_id = manager.add_task(f"worker {worker} task {i}", category=f"w{worker}")
+        if i % 4 == 1:
+            manager.edit_task(task_id, title=f"edited {task_id}", priority="высокий")
+            edited.append(task_id)
+        if i % 2:
+            manager.change_status(task_id, True)
+            completed.append(task_id)
+        if i % 3 == 0:
+            manager.delete_task(task_id)
+            deleted.append(task_id)
+        else:
+            kept.append(task_id)
+    manager.close()
+    return kept, completed, deleted, edited
+
+@pytest.mark.parametrize("backend", ["json", "journal"])
+def test_processes_do_not_lose_writes(tmp_path, backend):
+    filename = str(tmp_path / "tasks.json")
+    with multiprocessing.get_context("fork").Pool(WORKERS) as pool:
+        results = pool.starmap(hammer, [(filename, backend, worker) for worker in range(WORKERS)])
+
+    repository = open_repository(filename, backend=backend)
+    kept = {task_id for ids, _, _, _ in results for task_id in ids}
+    completed = {task_id for _, ids, _, _ in results for task_id in ids} & kept
+    deleted = {task_id for _, _, ids, _ in results for task_id in ids}
+    edited = {task_id for _, _, _, ids in results for task_id in ids} & kept
+
+    assert {task.task_id for task in repository.tasks} == kept
+    assert {task.task_id for task in repository.filter_tasks(completed=True)} == completed
+    assert not deleted & {task.task_id for task in repository.tasks}
+    assert {task.task_id for task in repository.tasks if task.title.startswith("edited")} == edited
+    assert all(repository.get_task(task_id).title == f"edited {task_id}" and repository.get_task(task_id).priority == "высокий"
+               for task_id in edited)
+
+@pytest.mark.parametrize("backend", ["json", "journal"])
+def test_reader_refreshes_changes_of_other_writer(tmp_path, backend):
+    filename = str(tmp_path / "tasks.json")
+    writer = open_repository(filename, backend=backend, shared=True)
+    reader = open_repository(filename, backend=backend, shared=True)
+    writer.add_task(Task(1, "first", None, "work", None))
+
+    assert reader.get_tasks_by_category("work")[0].title == "first"
+    first = reader.get_task(1)
+    assert reader.refresh() is False # Файл не менялся: данные не перечитываются
+
+    writer.add_task(Task(2, "second", None, "work", None))
+    writer.update_task(1, completed=True)
+    assert [task.task_id for task in reader.filter_tasks(category="work", completed=False)] == [2]
+    if backend == "journal": # Дочитан только хвост журнала: прежние объекты Task остались на месте
+        assert reader.get_task(1) is first
+
+def test_mutation_applies_on_top_of_other_writer(tmp_path):
+    filename = str(tmp_path / "tasks.json")
+    first = open_repository(filename, shared=True)
+    second = open_repository(filename, shared=True)
+    first.add_task(Task(1, "from first", None, None, None))
+    second.add_task(Task(2, "from second", None, None, None)) # Без подхвата изменений перезаписал бы задачу 1
+
+    assert [task.task_id for task in open_repository(filename).tasks] == [1, 2]
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.db"])
+def test_processes_get_distinct_id_nodes(tmp_path, filename):
+    """Номер узла выдает хранилище, а не PID: даже два менеджера в одном процессе не выдают одинаковых ID."""
+    filename = str(tmp_path / filename)
+    first, second = TaskManager(filename, None, shared=True), TaskManager(filename, None, shared=True)
+    assert first.ids.node != second.ids.node
+
+    ids = [first.add_task("from first"), second.add_task("from second"), *first.add_tasks([{"title": "bulk"}] * 3)]
+    assert len(set(ids)) == 5
+    assert len(open_repository(filename).tasks) == 5
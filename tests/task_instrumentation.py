@@ -0,0 +1,44 @@
+import pstats
+
+import pytest
+
+from src import instrumentation
+from src.instrumentation import STATS, profiled
+from src.repository import TaskRepository
+from src.services import TaskManager, IndexedTaskSearcher
+
+@pytest.fixture
+def stats():
+    instrumentation.enable()
+    STATS.reset()
+    yield STATS
+    instrumentation.disable()
+    STATS.reset()
+
+@pytest.mark.parametrize("filename", ["test_tasks.json", "test_tasks.db"])
+def test_operations_are_timed_and_counted(tmp_path, stats, filename):
+    manager = TaskManager(str(tmp_path / filename), IndexedTaskSearcher())
+    manager.add_tasks([{"title": "task A", "category": "work"}, {"title": "task B"}])
+    manager.search(keyword="task")
+    manager.search(keyword="task") # Второй раз - из кэша
+
+    assert stats.timings["TaskManager.search"][0] == 2
+    assert stats.timings["TaskManager.add_tasks"][0] == 1
+    if filename.endswith(".json"):
+        assert stats.counters["Поиск: просмотрено задач"] == [1, 2]
+        assert stats.counters["Запись файла: байт"][1] > 0
+    assert "TaskManager.search" in stats.table()
+
+def test_disabled_methods_are_untouched(stats):
+    wrapped = TaskRepository.add_task
+    instrumentation.disable()
+
+    assert wrapped is not TaskRepository.add_task
+    assert not hasattr(TaskRepository.add_task, "__wrapped__") # Исходная функция, без обертки
+
+def test_profiled_session(tmp_path):
+    output = str(tmp_path / "session.prof")
+    with profiled(output):
+        TaskManager(str(tmp_path / "tasks.json"), None).add_tasks([{"title": "task"}])
+
+    assert pstats.Stats(output).total_calls > 0
@@ -1,13 +1,15 @@
 import pytest
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from src.model import Task
 from src.services import TaskManager
-from src.utils import ValidationError
+from src.utils import DuplicateTaskError, NoResultFound, ValidationError
 
-@pytest.fixture
-def task_manager(tmp_path):
-    """Создаем фикстуру с объектом TaskManager для тестирования"""
-    test_file = tmp_path / "test_tasks.json"
+@pytest.fixture(params=["test_tasks.json", "test_tasks.db"], ids=["json", "sqlite"])
+def task_manager(tmp_path, request):
+    """Создаем фикстуру с объектом TaskManager для тестирования (для каждого типа хранилища)"""
+    test_file = tmp_path / request.param
     manager = TaskManager(str(test_file), None) # None, т.к. мы не используем TaskSearcher => нет нужды его передавать
     return manager
 
@@ -61,3 +63,175 @@ def test_delete_task(task_manager):
     task_manager.delete_task(deleted_task_id)
 
     assert len(task_manager.repository.tasks) == 0
+
+def test_get_task_after_delete(task_manager):
+    task_manager.add_task("first")
+    task_manager.add_task("second")
+    first, second = task_manager.repository.tasks
+
+    assert task_manager.delete_task(first.task_id) is True
+    assert task_manager.delete_task(first.task_id) is False
+    assert task_manager.repository.get_task(second.task_id) is second
+    with pytest.raises(NoResultFound):
+        task_manager.repository.get_task(first.task_id)
+
+def test_indexes_follow_edits(task_manager):
+    task_manager.add_task("task A", category="Work", deadline="2024-12-01")
+    task_manager.add_task("task B", category="home", deadline="2024-11-01")
+    task_manager.add_task("task C", category="work")
+    task_a, task_b, task_c = task_manager.repository.tasks
+
+    task_manager.edit_task(task_b.task_id, category="WORK", deadline=datetime(2025, 1, 1))
+    task_manager.change_status(task_a.task_id, True)
+
+    assert task_manager.view_tasks_by_category("work") == [task_a, task_b, task_c]
+    assert task_manager.view_tasks_by_category("home") == []
+    assert task_manager.view_tasks_due_before(datetime(2025, 1, 1)) == [task_a]
+    assert task_manager.search(category="work", completed=False) == [task_b, task_c]
+    assert task_manager.search(keyword="task a", completed=True) == [task_a]
+
+def test_priority_is_validated(task_manager):
+    task_manager.add_task("task", priority=" Высокий ")
+    task = task_manager.repository.tasks[0]
+
+    assert task.priority == "высокий"
+    with pytest.raises(ValidationError):
+        task_manager.edit_task(task.task_id, title="renamed", priority="срочный")
+    assert task.title == "task"
+    assert task.priority == "высокий"
+
+def test_unknown_priority_in_file_does_not_break_loading(tmp_path):
+    filename = tmp_path / "tasks.json"
+    filename.write_text('[{"task_id": 1, "title": "old", "description": null, "category": null, "deadline": null,'
+                        ' "priority": "high", "completed": false},'
+                        ' {"task_id": 2, "title": "odd", "description": null, "category": null, "deadline": null,'
+                        ' "priority": "срочно", "completed": false}]', encoding="utf-8")
+    manager = TaskManager(str(filename), None, background_load=True)
+    assert [task.priority for task in manager.view_tasks()] == ["высокий", "низкий"]
+    with pytest.raises(ValidationError): # Ввод пользователя по-прежнему проверяется строго
+        manager.add_task("new", priority="high")
+
+def test_bulk_filter(task_manager):
+    task_manager.add_task("task A", category="Work", deadline="2024-12-01", priority="высокий")
+    task_manager.add_task("task B", category="work", priority="высокий")
+    task_manager.add_task("task C", category="home", deadline="2024-11-01", priority="высокий")
+    task_manager.add_task("task D", category="work", deadline="2024-10-01")
+    task_a, task_b, task_c, task_d = task_manager.repository.tasks
+    task_manager.change_status(task_b.task_id, True)
+
+    repository = task_manager.repository
+    assert repository.bulk_filter(category="WORK", priority="высокий") == [task_a, task_b]
+    assert repository.bulk_filter(priority="высокий", completed=False) == [task_a, task_c]
+    assert repository.bulk_filter(due_before=datetime(2024, 11, 15)) == [task_c, task_d]
+    assert repository.bulk_filter(category="unknown") == []
+
+def test_bulk_operations(task_manager):
+    ids = task_manager.add_tasks([
+        {"title": "task A", "category": "bulk"},
+        {"title": "task B", "category": "Bulk", "deadline": "2024-12-01"},
+        {"title": "task C"},
+    ])
+
+    assert [task.task_id for task in task_manager.view_tasks()] == ids
+    assert task_manager.update_where({"category": "bulk"}, {"completed": True}) == 2
+    assert task_manager.update_where(lambda task: task.category is None, {"priority": "высокий"}) == 1
+    assert [task.title for task in task_manager.search(completed=True)] == ["task A", "task B"]
+    assert task_manager.delete_tasks([ids[0], ids[2], ids[2]]) == 2
+    assert [task.title for task in task_manager.view_tasks()] == ["task B"]
+
+def test_batch_rollback(task_manager):
+    first_id = task_manager.add_task("first", category="keep")
+    second_id = task_manager.add_task("second")
+
+    with pytest.raises(RuntimeError):
+        with task_manager.batch():
+            task_manager.add_task("temporary")
+            task_manager.edit_task(second_id, title="changed", category="keep")
+            task_manager.delete_task(first_id)
+            raise RuntimeError("abort")
+
+    expected = [(first_id, "first", "keep"), (second_id, "second", None)]
+    assert [(t.task_id, t.title, t.category) for t in task_manager.view_tasks()] == expected
+    assert [t.task_id for t in task_manager.view_tasks_by_category("keep")] == [first_id]
+
+    reopened = TaskManager(task_manager.repository.filename, None)
+    assert [(t.task_id, t.title, t.category) for t in reopened.view_tasks()] == expected
+
+def test_generate_task_id_is_unique_and_monotonic(task_manager):
+    task_manager.repository.add_task(Task(3857986989, "legacy id", None, None, None))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        ids = list(pool.map(lambda _: task_manager.generate_task_id(), range(2000)))
+
+    assert len(set(ids)) == len(ids)
+    assert min(ids) > 3857986989
+    assert task_manager.generate_task_id() > max(ids)
+
+def test_add_duplicate_id(task_manager):
+    task_manager.repository.add_task(Task(1, "first", None, None, None))
+
+    with pytest.raises(DuplicateTaskError):
+        task_manager.repository.add_task(Task(1, "duplicate", None, None, None))
+    assert [task.title for task in task_manager.view_tasks()] == ["first"]
+
+def test_view_page(task_manager):
+    task_manager.add_task("task A", deadline="2024-12-01")
+    task_manager.add_task("task B", priority="высокий")
+    task_manager.add_task("task C", deadline="2024-11-01", priority="средний")
+    task_manager.change_status(task_manager.view_tasks()[0].task_id, True)
+
+    titles = lambda tasks: [task.title for task in tasks]
+    assert task_manager.count_tasks() == 3
+    assert titles(task_manager.view_page(1, 2)) == ["task B", "task C"]
+    assert titles(task_manager.view_page(0, 3, "priority")) == ["task B", "task C", "task A"]
+    assert titles(task_manager.view_page(0, 3, "deadline")) == ["task C", "task A", "task B"]
+    assert titles(task_manager.view_page(0, 2, "status")) == ["task B", "task C"]
+
+def test_search_cache_hits_and_invalidation(task_manager):
+    first = task_manager.add_task("task A", category="work")
+    task_manager.add_task("task B", category="home")
+
+    assert [t.title for t in task_manager.search(category="Work")] == ["task A"]
+    assert [t.title for t in task_manager.view_tasks_by_category("work")] == ["task A"] # Тот же нормализованный запрос
+    assert task_manager.cache_stats()["hits"] == 1
+
+    task_manager.edit_task(first, category="home")
+    assert task_manager.view_tasks_by_category("work") == []
+    task_manager.change_status(first, True)
+    assert [t.title for t in task_manager.search(category="home", completed=True)] == ["task A"]
+    assert task_manager.search(category="home", completed=True)[0].completed
+
+    stats = task_manager.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+
+def test_search_cache_sees_other_writers(tmp_path):
+    for name in ("shared.json", "shared.db"):
+        filename = str(tmp_path / name)
+        reader = TaskManager(filename, None, shared=True)
+        writer = TaskManager(filename, None, shared=True)
+        writer.add_task("task A", category="work")
+        assert len(reader.search(category="work")) == 1
+
+        writer.add_task("task B", category="work")
+        assert len(reader.search(category="work")) == 2
+        assert reader.cache_stats()["hits"] == 0
+
+def test_cli_exit_after_invalid_choice(tmp_path, monkeypatch, capsys):
+    from src.presentation import TaskCLI
+    filename = str(tmp_path / "tasks.json")
+    answers = iter(["9", "2", "task", "", "", "", "", "0"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    TaskCLI(filename).run()
+
+    assert [task.title for task in TaskManager(filename, None).view_tasks()] == ["task"]
+
+def test_cli_uses_journal_backend(tmp_path, monkeypatch):
+    from src.presentation import TaskCLI
+    filename = str(tmp_path / "tasks.json")
+    answers = iter(["2", "task", "", "", "", "", "2", "other", "", "", "", "", "0"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    TaskCLI(filename, backend="journal").run()
+
+    with open(f"{filename}.journal", encoding="utf-8") as file:
+        assert len(file.readlines()) == 2 # Каждое изменение - строка журнала, а не перезапись файла
+    assert [task.title for task in TaskManager(filename, None, backend="journal").view_tasks()] == ["task", "other"]
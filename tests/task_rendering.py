@@ -0,0 +1,45 @@
+import io
+
+from src.model import Task
+from src.rendering import TaskPager
+
+def make_tasks(count):
+    return [Task(i, f"task {i}", None, None, None, priority="высокий" if i % 2 else "низкий") for i in range(count)]
+
+def test_pager_formats_only_visible_page():
+    requested = []
+    tasks = make_tasks(25)
+
+    def fetch(offset, limit, order_by):
+        requested.append((offset, limit, order_by))
+        return tasks[offset:offset + limit]
+
+    out = io.StringIO()
+    TaskPager(fetch, len(tasks), page_size=10, out=out).show()
+
+    assert requested == [(0, 10, None)]
+    assert "ID: 9 |" in out.getvalue() and "ID: 10 |" not in out.getvalue()
+    assert "Страница 1/3 (всего задач: 25)" in out.getvalue()
+
+class PageLog:
+    """Вывод, который сохраняет каждую показанную страницу отдельно."""
+    def __init__(self):
+        self.pages = []
+
+    def write(self, text):
+        self.pages.append(text)
+
+    def flush(self):
+        pass
+
+def test_pager_navigation_and_sorting():
+    out = PageLog()
+    commands = iter(["3", "p", "s приоритет", "q"])
+
+    TaskPager.for_list(make_tasks(25), page_size=10, out=out).run(read=lambda prompt: next(commands))
+
+    first, third, second, sorted_first = out.pages
+    assert "ID: 0 |" in first and "Страница 1/3" in first
+    assert "ID: 24 |" in third and "Страница 3/3" in third
+    assert "ID: 10 |" in second and "Страница 2/3" in second
+    assert sorted_first.startswith("ID: 1 |") and "ID: 0 |" not in sorted_first
@@ -1,7 +1,12 @@
+from datetime import datetime
+
 import pytest
 
+from src import instrumentation
+from src.instrumentation import STATS
 from src.model import Task
-from src.services import TaskSearcher
+from src.query import Query
+from src.services import IndexedTaskSearcher, TaskManager, TaskSearcher
 
 @pytest.fixture
 def sample_tasks():
@@ -54,3 +59,100 @@ def test_search_with_none_values(sample_tasks):
     results = TaskSearcher.search(sample_tasks, keyword=None, category=None, completed=None)
     
     assert len(results) == len(sample_tasks)
+
+@pytest.fixture(params=["test_tasks.json", "test_tasks.db"], ids=["json", "sqlite"])
+def indexed_manager(tmp_path, sample_tasks, request):
+    manager = TaskManager(str(tmp_path / request.param), IndexedTaskSearcher())
+    for task in sample_tasks:
+        manager.repository.add_task(task)
+    return manager
+
+@pytest.mark.parametrize("keyword, category, completed", [
+    ("task", None, None),
+    ("third", None, None),
+    (None, "Category A", None),
+    (None, None, True),
+    ("task", "Category A", None),
+    ("Nonexistent", None, None),
+    (None, None, None),
+    ("K O", None, None),
+    ("ta", None, False),
+    ("SK DESC", "category c", True),
+])
+def test_indexed_search_matches_static(indexed_manager, sample_tasks, keyword, category, completed):
+    expected = TaskSearcher.search(sample_tasks, keyword=keyword, category=category, completed=completed)
+
+    assert indexed_manager.search(keyword=keyword, category=category, completed=completed) == expected
+
+def test_indexed_search_follows_edits(indexed_manager):
+    indexed_manager.edit_task(3, title="Задача про ОТЧЁТ")
+    indexed_manager.delete_task(1)
+
+    assert [t.task_id for t in indexed_manager.search(keyword="отчёт")] == [3]
+    assert [t.task_id for t in indexed_manager.search(keyword="another")] == []
+    assert [t.task_id for t in indexed_manager.search(keyword="task")] == [2, 4]
+
+@pytest.fixture
+def dated_tasks():
+    return [
+        Task(1, "Отчёт по проекту", "черновик", "Проект", datetime(2024, 5, 10), "высокий"),
+        Task(2, "Report draft", None, "project", datetime(2024, 5, 1), "высокий", completed=True),
+        Task(3, "Созвон", "обсудить отчёт", "Проект", None, "высокий"),
+        Task(4, "Plan sprint", None, "project", datetime(2024, 4, 20), "низкий"),
+        Task(5, "Отчёт за квартал", None, "Дом", datetime(2024, 4, 1), "высокий"),
+        Task(6, "Release notes", "report", "Project", datetime(2024, 4, 25), "высокий"),
+    ]
+
+@pytest.fixture(params=["test_tasks.json", "test_tasks.db"], ids=["json", "sqlite"])
+def dated_manager(tmp_path, dated_tasks, request):
+    manager = TaskManager(str(tmp_path / request.param), IndexedTaskSearcher())
+    manager.repository.add_tasks(dated_tasks)
+    return manager
+
+@pytest.mark.parametrize("build", [
+    lambda: Query().category("проект").open().due_before(datetime(2024, 6, 1)).priority("высокий").order_by("deadline").limit(20),
+    lambda: Query().text("отчёт"),
+    lambda: Query().title("отчёт"),
+    lambda: Query().category("PROJECT").done(),
+    lambda: Query().due_after(datetime(2024, 4, 20)).due_before(datetime(2024, 5, 5)),
+    lambda: Query().priority("высокий").order_by("deadline").limit(3),
+    lambda: Query().text("re").order_by("priority"),
+    lambda: Query().open().limit(2),
+    lambda: Query().order_by("status"),
+])
+def test_select_matches_full_scan(dated_manager, dated_tasks, build):
+    expected = list(build().filter(dated_tasks))
+
+    assert [task.task_id for task in dated_manager.select(build())] == [task.task_id for task in expected]
+
+def test_query_chain(dated_tasks):
+    query = Query().category("проект").open().due_before(datetime(2024, 6, 1)).priority("высокий").order_by("deadline")
+
+    assert [task.task_id for task in query.filter(dated_tasks)] == [1]
+    assert [task.task_id for task in query.category("project").filter(dated_tasks)] == [6]
+    assert [task.task_id for task in Query().text("отчёт").limit(2).filter(dated_tasks)] == [1, 3]
+    with pytest.raises(ValueError):
+        Query().order_by("title")
+
+def test_filter_stops_at_limit(dated_tasks):
+    seen = []
+    def tasks():
+        for task in dated_tasks:
+            seen.append(task.task_id)
+            yield task
+
+    assert [task.task_id for task in Query().open().limit(2).filter(tasks())] == [1, 3]
+    assert seen == [1, 2, 3]
+
+def test_select_stops_scanning_at_limit(tmp_path):
+    manager = TaskManager(str(tmp_path / "tasks.json"), IndexedTaskSearcher())
+    manager.add_tasks([{"title": f"task {i}", "category": "work" if i % 2 else "home"} for i in range(1000)])
+    instrumentation.enable()
+    STATS.reset()
+    try:
+        assert len(manager.select(Query().open().limit(20))) == 20
+        assert [task.title for task in manager.select(Query().category("work").open().limit(3))] == ["task 1", "task 3", "task 5"]
+        assert STATS.counters["Поиск: просмотрено задач"] == [2, 20 + 3] # Только до limit-й подходящей задачи
+    finally:
+        instrumentation.disable()
+        STATS.reset()
@@ -0,0 +1,98 @@
+import asyncio
+from urllib.parse import urlencode
+
+import pytest
+
+from src.repository import open_repository
+from src.server import start_server, call
+from src.services import TaskManager, IndexedTaskSearcher
+
+def run_against_server(filename: str, scenario) -> object:
+    """Запуск сервиса над filename на свободном порту, выполнение scenario(connect, service) и остановка сервиса."""
+    async def main():
+        manager = TaskManager(filename, IndexedTaskSearcher(), background_save=filename.endswith(".json"))
+        server, service = await start_server(manager, port=0)
+        port = server.sockets[0].getsockname()[1]
+        connect = lambda: asyncio.open_connection("127.0.0.1", port)
+        try:
+            return await scenario(connect, service)
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.stop()
+    return asyncio.run(main())
+
+@pytest.fixture(params=["tasks.json", "tasks.db"], ids=["json", "sqlite"])
+def filename(tmp_path, request):
+    return str(tmp_path / request.param)
+
+def test_crud_over_http(filename):
+    async def scenario(connect, service):
+        reader, writer = await connect()
+        status, created = await call(reader, writer, "POST", "/tasks",
+                                     {"title": "Отчёт", "category": "работа", "deadline": "2025-03-01", "priority": "высокий"})
+        assert status == 201
+        task_id = created["task_id"]
+        assert [task.task_id for task in open_repository(filename).tasks] == [task_id] # Ответ - после записи на диск
+
+        assert (await call(reader, writer, "GET", f"/tasks/{task_id}"))[1]["title"] == "Отчёт"
+        status, edited = await call(reader, writer, "PATCH", f"/tasks/{task_id}", {"title": "Годовой отчёт"})
+        assert status == 200 and edited["title"] == "Годовой отчёт"
+        status, done = await call(reader, writer, "PUT", f"/tasks/{task_id}/status", {"completed": True})
+        assert status == 200 and done["completed"] is True
+
+        status, found = await call(reader, writer, "GET", "/tasks?" + urlencode({"keyword": "годовой", "completed": "true"}))
+        assert status == 200 and [task["task_id"] for task in found] == [task_id]
+
+        assert (await call(reader, writer, "DELETE", f"/tasks/{task_id}"))[0] == 200
+        assert (await call(reader, writer, "GET", f"/tasks/{task_id}"))[0] == 404
+        assert (await call(reader, writer, "DELETE", f"/tasks/{task_id}"))[0] == 404
+        writer.close()
+        await writer.wait_closed()
+
+    run_against_server(filename, scenario)
+    assert open_repository(filename).tasks == []
+
+def test_invalid_requests(filename):
+    async def scenario(connect, service):
+        reader, writer = await connect()
+        assert (await call(reader, writer, "POST", "/tasks", {"description": "без названия"}))[0] == 400
+        assert (await call(reader, writer, "POST", "/tasks", {"title": "Срок", "deadline": "завтра"}))[0] == 400
+        assert (await call(reader, writer, "POST", "/tasks", {"title": "Приоритет", "priority": "срочно"}))[0] == 400
+        assert (await call(reader, writer, "POST", "/tasks", {"title": "Поле", "owner": "я"}))[0] == 400
+        assert (await call(reader, writer, "PATCH", "/tasks/1", {"title": "Нет такой"}))[0] == 404
+        assert (await call(reader, writer, "GET", "/tasks?" + urlencode({"limit": "много"})))[0] == 400
+        assert (await call(reader, writer, "PUT", "/tasks"))[0] == 405
+        assert (await call(reader, writer, "GET", "/nowhere"))[0] == 404
+        # Соединение остается рабочим после ошибок
+        assert (await call(reader, writer, "GET", "/stats"))[1]["tasks"] == 0
+        writer.close()
+        await writer.wait_closed()
+
+    run_against_server(filename, scenario)
+
+def test_concurrent_writes_are_batched(filename):
+    clients, per_client = 20, 10
+
+    async def client(connect, i):
+        reader, writer = await connect()
+        ids = []
+        for j in range(per_client):
+            status, created = await call(reader, writer, "POST", "/tasks", {"title": f"client {i} task {j}", "category": f"c{i % 3}"})
+            assert status == 201
+            ids.append(created["task_id"])
+            status, found = await call(reader, writer, "GET", "/tasks?" + urlencode({"category": f"c{i % 3}"}))
+            assert status == 200 and ids[-1] in {task["task_id"] for task in found}
+        writer.close()
+        await writer.wait_closed()
+        return ids
+
+    async def scenario(connect, service):
+        ids = await asyncio.gather(*(client(connect, i) for i in range(clients)))
+        return ids, service.batches, service.writes
+
+    ids, batches, writes = run_against_server(filename, scenario)
+    assert writes == clients * per_client
+    assert batches < writes # Одновременные изменения записываются общими пакетами
+    stored = {task.task_id for task in open_repository(filename).tasks}
+    assert stored == {task_id for client_ids in ids for task_id in client_ids}
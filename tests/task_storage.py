@@ -0,0 +1,256 @@
+import os
+import json
+from datetime import datetime
+
+import pytest
+
+from src.model import Task
+from src.repository import TaskRepository, open_repository
+from src.binary import BinarySnapshot, BinaryStorage
+from src.migrate import migrate
+from src.services import TaskManager, IndexedTaskSearcher
+from src.storage import BackgroundJsonStorage, JournalStorage, JsonStorage, iter_json_array
+from src.utils import StaleDataError
+
+@pytest.fixture
+def journal_file(tmp_path):
+    return str(tmp_path / "tasks.snapshot")
+
+def open_manager(journal_file, **kwargs):
+    return TaskManager(journal_file, None, storage=JournalStorage(journal_file, **kwargs))
+
+def make_task(task_id, title, **kwargs):
+    return Task(task_id, title, kwargs.get("description"), kwargs.get("category"), kwargs.get("deadline"))
+
+def test_journal_replay(journal_file):
+    manager = open_manager(journal_file)
+    manager.repository.add_task(make_task(1, "task A", category="work"))
+    manager.repository.add_task(make_task(2, "task B", deadline=datetime(2024, 12, 1)))
+    manager.change_status(1, True)
+    manager.edit_task(2, title="task B (edited)", deadline=datetime(2025, 1, 1))
+    manager.delete_task(1)
+    manager.close()
+
+    assert not os.path.exists(journal_file) # Снимок еще не создавался, все изменения лежат в журнале
+
+    reopened = open_manager(journal_file)
+    tasks = reopened.repository.tasks
+
+    assert len(tasks) == 1
+    assert tasks[0].title == "task B (edited)"
+    assert tasks[0].deadline == datetime(2025, 1, 1)
+
+def test_journal_compaction(journal_file):
+    manager = open_manager(journal_file, compact_after=3)
+    for i in range(4):
+        manager.repository.add_task(make_task(i, f"task {i}"))
+    manager.close()
+
+    with open(journal_file, encoding="utf-8") as file:
+        assert len(json.load(file)) == 3
+    with open(f"{journal_file}.journal", encoding="utf-8") as file:
+        assert len(file.readlines()) == 1
+
+    assert [task.title for task in open_manager(journal_file).repository.tasks] == [f"task {i}" for i in range(4)]
+
+def test_journal_ignores_torn_tail(journal_file):
+    manager = open_manager(journal_file)
+    manager.repository.add_task(make_task(1, "kept"))
+    manager.close()
+
+    with open(f"{journal_file}.journal", "a", encoding="utf-8") as file:
+        file.write('{"op": "add", "task": {"task_id": 1, "tit')
+
+    manager = open_manager(journal_file)
+    assert [task.title for task in manager.repository.tasks] == ["kept"]
+    # Записи после сбоя не должны теряться вместе с недописанной строкой
+    manager.repository.add_task(make_task(3, "after crash"))
+    manager.repository.add_task(make_task(4, "after crash too"))
+    manager.close()
+    assert [task.task_id for task in open_manager(journal_file).repository.tasks] == [1, 3, 4]
+
+def test_import_json(tmp_path, journal_file):
+    json_file = str(tmp_path / "tasks.json")
+    TaskRepository(json_file).add_task(make_task(1, "from json", deadline=datetime(2024, 12, 1)))
+
+    JournalStorage.import_json(json_file, journal_file)
+    tasks = open_manager(journal_file).repository.tasks
+
+    assert len(tasks) == 1
+    assert tasks[0].title == "from json"
+    assert tasks[0].deadline == datetime(2024, 12, 1)
+
+def test_iter_json_array_across_chunks(tmp_path):
+    records = [{"task_id": i, "title": f"Задача {i}", "text": "x" * i} for i in range(50)]
+    path = tmp_path / "tasks.json"
+    path.write_text(json.dumps(records, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    with open(path, encoding="utf-8") as file:
+        assert list(iter_json_array(file, chunk_chars=7)) == records
+
+def test_background_load_keeps_deadline_text(tmp_path):
+    json_file = str(tmp_path / "tasks.json")
+    with open(json_file, "w", encoding="utf-8") as file:
+        json.dump([make_task(1, "task", deadline="2024-12-01T00:00:00").to_dict()], file)
+
+    repository = TaskRepository(json_file, background_load=True)
+    task = repository.get_task(1)
+
+    assert task.to_dict()["deadline"] == "2024-12-01T00:00:00"
+    assert task.deadline == datetime(2024, 12, 1)
+    assert repository.get_tasks_due_before(datetime(2025, 1, 1)) == [task]
+
+def test_migrate_json_to_sqlite(tmp_path):
+    json_file, db_file = str(tmp_path / "tasks.json"), str(tmp_path / "tasks.db")
+    repository = TaskRepository(json_file)
+    repository.add_task(make_task(1, "first", category="Work", deadline=datetime(2024, 12, 1)))
+    repository.add_task(make_task(2, "second"))
+
+    assert migrate(json_file, db_file) == 2
+
+    migrated = TaskManager(db_file, None).repository
+    assert [task.to_dict() for task in migrated.tasks] == [task.to_dict() for task in repository.tasks]
+
+def test_journal_batch_is_one_entry(journal_file):
+    manager = open_manager(journal_file)
+    with manager.batch():
+        manager.repository.add_task(make_task(1, "task A"))
+        manager.repository.add_task(make_task(2, "task B"))
+        manager.change_status(1, True)
+    manager.close()
+
+    with open(f"{journal_file}.journal", encoding="utf-8") as file:
+        assert len(file.readlines()) == 1
+    assert [(task.title, task.completed) for task in open_manager(journal_file).repository.tasks] == [("task A", True), ("task B", False)]
+
+def test_background_storage_coalesces_and_flushes(tmp_path):
+    json_file = str(tmp_path / "tasks.json")
+    manager = TaskManager(json_file, None, background_save=True)
+    for i in range(20):
+        manager.repository.add_task(make_task(i, f"task {i}"))
+    manager.flush()
+
+    assert [task.title for task in TaskRepository(json_file).tasks] == [f"task {i}" for i in range(20)]
+    manager.close()
+
+def test_background_storage_rejects_stale_snapshot(tmp_path):
+    json_file = str(tmp_path / "tasks.json")
+    manager = TaskManager(json_file, None, background_save=True)
+    manager.repository.add_task(make_task(1, "first"))
+    manager.flush()
+
+    newer = BackgroundJsonStorage(json_file)
+    newer.save([make_task(2, "newer")])
+    newer.close()
+
+    manager.repository.add_task(make_task(3, "stale"))
+    with pytest.raises(StaleDataError):
+        manager.flush()
+    # Следующее изменение сразу отклоняется, а не затирает чужие данные
+    with pytest.raises(StaleDataError):
+        manager.repository.add_task(make_task(4, "still stale"))
+    with pytest.raises(StaleDataError):
+        manager.flush()
+    assert [task.title for task in TaskRepository(json_file).tasks] == ["newer"]
+
+def test_background_storage_rejects_stale_writer_with_more_saves(tmp_path):
+    json_file = str(tmp_path / "tasks.json")
+    first = TaskManager(json_file, None, background_save=True)
+    second = TaskManager(json_file, None, background_save=True)
+    first.repository.add_task(make_task(1, "from first"))
+    first.flush()
+
+    # Два снимка второго процесса объединяются в одну запись: поколений у него столько же, сколько на диске
+    second.repository.add_task(make_task(2, "from second"))
+    second.repository.add_task(make_task(3, "from second"))
+    with pytest.raises(StaleDataError):
+        second.flush()
+    assert [task.title for task in TaskRepository(json_file).tasks] == ["from first"]
+    first.close()
+
+def test_background_storage_saves_after_close(tmp_path):
+    json_file = str(tmp_path / "tasks.json")
+    storage = BackgroundJsonStorage(json_file)
+    storage.save([make_task(1, "before close")])
+    storage.close()
+    storage.save([make_task(1, "before close"), make_task(2, "after close")])
+    storage.close()
+    assert [task.title for task in TaskRepository(json_file).tasks] == ["before close", "after close"]
+
+def test_binary_snapshot_roundtrip(tmp_path):
+    source = str(tmp_path / "tasks.json")
+    manager = TaskManager(source, None)
+    manager.repository.add_tasks([
+        make_task(1, "Отчёт", description="черновик", category="Работа", deadline=datetime(2024, 5, 1, 9, 30)),
+        make_task(2, "task two"),
+        Task(3, "done", "", "работа", None, "высокий", completed=True),
+    ])
+    target = str(tmp_path / "tasks.ttdb")
+
+    assert migrate(source, target) == 3
+    with BinarySnapshot(target) as snapshot:
+        assert len(snapshot) == 3
+        assert snapshot.filter(category="РАБОТА") == [1, 3]
+        assert snapshot.filter(category="работа", completed=False) == [1]
+        assert snapshot.filter(completed=True) == [3]
+        assert snapshot.filter(category="дом") == []
+        assert snapshot.task(0).deadline == datetime(2024, 5, 1, 9, 30)
+
+    back = str(tmp_path / "back.json")
+    migrate(target, back)
+    assert [task.to_dict() for task in open_repository(back).tasks] == [task.to_dict() for task in manager.view_tasks()]
+
+def test_binary_storage_repository(tmp_path):
+    filename = str(tmp_path / "tasks.ttdb")
+    manager = TaskManager(filename, None)
+    first = manager.add_task("task A", category="work", deadline="2024-12-01", priority="средний")
+    manager.add_task("task B")
+    manager.change_status(first, True)
+
+    reopened = TaskManager(filename, None)
+    assert [task.to_dict() for task in reopened.view_tasks()] == [task.to_dict() for task in manager.view_tasks()]
+    assert reopened.view_tasks()[0].priority == "средний"
+
+def test_binary_storage_decodes_lazily(tmp_path):
+    filename = str(tmp_path / "tasks.ttdb")
+    TaskRepository(filename, BinaryStorage(filename)).add_tasks([
+        make_task(1, "Отчёт", category="Работа", deadline=datetime(2024, 5, 1)),
+        make_task(2, "task two", category="дом"),
+        Task(3, "done", None, "работа", datetime(2025, 1, 1), "высокий", completed=True),
+    ])
+
+    manager = TaskManager(filename, IndexedTaskSearcher())
+    repository = manager.repository
+    assert len(repository) == 3 and repository.max_task_id() == 3 and 2 in repository
+    assert [task.task_id for task in repository.bulk_filter(category="работа")] == [1, 3]
+    assert [task.task_id for task in repository.bulk_filter(due_before=datetime(2024, 12, 1))] == [1]
+    assert repository.columns().filter(priority="высокий", completed=True) == [3]
+    assert [task.title for task in repository.view_page(1, 5)] == ["task two", "done"]
+    first = repository.get_task(1)
+    assert repository._snapshot is not None and len(repository._decoded) == 3 # Задачи не декодировались целиком
+
+    # Первое изменение декодирует снимок и строит индексы; уже выданные задачи остаются теми же объектами
+    manager.change_status(1, True)
+    assert repository._snapshot is None
+    assert repository.get_task(1) is first and first.completed
+    assert [task.task_id for task in manager.search(keyword="отчёт")] == [1]
+    assert [task.task_id for task in manager.view_tasks_by_category("работа")] == [1, 3]
+    manager.close()
+    assert [task.completed for task in TaskManager(filename, None).view_tasks()] == [True, False, True]
+
+def test_batch_keeps_operations_only_for_storages_that_use_them(tmp_path, journal_file):
+    batches = []
+    class RecordingJsonStorage(JsonStorage):
+        def record_batch(self, ops, tasks):
+            batches.append(ops)
+            super().record_batch(ops, tasks)
+
+    filename = str(tmp_path / "tasks.json")
+    repository = TaskRepository(filename, RecordingJsonStorage(filename))
+    repository.add_tasks([make_task(1, "task A"), make_task(2, "task B")])
+    assert batches == [[]] and len(TaskRepository(filename)) == 2 # Файл перезаписан целиком, описания операций не нужны
+
+    manager = open_manager(journal_file)
+    manager.repository.add_tasks([make_task(1, "task A"), make_task(2, "task B")])
+    manager.close()
+    assert [task.title for task in open_manager(journal_file).view_tasks()] == ["task A", "task B"]
@@ -0,0 +1,92 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from src.model import Task
+from src.repository import open_repository
+from src import transfer
+from src.transfer import import_tasks, export_tasks, parse_record
+from src.utils import ValidationError
+
+@pytest.fixture(params=["tasks.json", "tasks.db"], ids=["json", "sqlite"])
+def repository(tmp_path, request):
+    repository = open_repository(str(tmp_path / request.param))
+    yield repository
+    repository.close()
+
+def sample_tasks() -> list[Task]:
+    return [
+        Task(1, "Отчёт, квартальный", "строка 1\nстрока 2", "работа", datetime(2025, 3, 1, 9, 30), "высокий", True),
+        Task(2, 'Купить "молоко"', None, None, None),
+        Task(3, "Deploy", "release", "project", datetime(2025, 1, 15), "средний"),
+    ]
+
+@pytest.mark.parametrize("dump", ["dump.jsonl", "dump.csv"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_import_roundtrip(tmp_path, repository, dump, workers):
+    source = open_repository(str(tmp_path / "source.json"))
+    source.add_tasks(sample_tasks())
+    assert export_tasks(source.tasks, str(tmp_path / dump)) == 3
+
+    report = import_tasks(repository, str(tmp_path / dump), workers=workers, chunk_size=2)
+    assert report["imported"] == 3 and report["invalid"] == 0 and report["duplicates"] == 0
+    assert [task.to_dict() for task in repository.tasks] == [task.to_dict() for task in source.tasks]
+    reopened = open_repository(repository.filename)
+    assert len(reopened) == 3
+    reopened.close()
+
+def test_import_skips_duplicates_and_invalid_records(tmp_path, repository):
+    repository.add_task(Task(1, "Уже есть", None, None, None))
+    lines = [
+        {"task_id": 1, "title": "Дубликат из хранилища"},
+        {"task_id": 5, "title": "Новая", "priority": "Высокий", "deadline": "2025-02-01", "completed": "да"},
+        {"task_id": 5, "title": "Дубликат в файле"},
+        {"title": "Без ID", "category": "дом"},
+        {"task_id": 6, "title": "  "},
+        {"task_id": 7, "title": "Плохой срок", "deadline": "завтра"},
+        {"task_id": 8, "title": "Плохой приоритет", "priority": 7},
+    ]
+    dump = tmp_path / "dump.jsonl"
+    dump.write_text("\n".join(json.dumps(line, ensure_ascii=False) for line in lines) + "\n{не json\n", encoding="utf-8")
+
+    progress = []
+    report = import_tasks(repository, str(dump), workers=2, chunk_size=3, progress=lambda report: progress.append(report["processed"]))
+    assert (report["imported"], report["duplicates"], report["invalid"]) == (2, 2, 4)
+    assert [number for number, _ in report["errors"]] == [5, 6, 7, 8]
+    assert progress == [3, 6, 8]
+
+    added = repository.get_task(5)
+    assert added.title == "Новая" and added.priority == "высокий" and added.completed and added.deadline == datetime(2025, 2, 1)
+    assert repository.get_task(1).title == "Уже есть"
+    assert [task.title for task in repository.tasks if task.task_id not in (1, 5)] == ["Без ID"]
+
+def test_parse_record_normalizes_csv_values():
+    record = parse_record({"task_id": "10", "title": "Задача", "description": "", "category": "", "deadline": "",
+                           "priority": "", "completed": "false"})
+    assert record == (10, "Задача", None, None, None, 0, False)
+    with pytest.raises(ValidationError):
+        parse_record({"task_id": "-1", "title": "Задача"})
+    with pytest.raises(ValidationError):
+        parse_record({"title": "Задача", "completed": "может быть"})
+
+def test_parse_record_converts_offset_deadline_to_naive_utc():
+    record = parse_record({"title": "Задача", "deadline": "2025-03-01T12:00:00+03:00"})
+    assert record[4] == datetime(2025, 3, 1, 9, 0)
+
+def test_import_reads_ahead_a_bounded_window(tmp_path, repository, monkeypatch):
+    dump = tmp_path / "dump.jsonl"
+    dump.write_text("".join(json.dumps({"task_id": i, "title": f"task {i}"}) + "\n" for i in range(1, 201)), encoding="utf-8")
+    read = []
+    original = transfer.read_chunks
+    def counting(*args):
+        for chunk in original(*args):
+            read.append(chunk[2])
+            yield chunk
+    monkeypatch.setattr(transfer, "read_chunks", counting)
+
+    ahead = []
+    report = import_tasks(repository, str(dump), workers=2, chunk_size=2,
+                          progress=lambda report: ahead.append(len(read) - report["processed"] // 2))
+    assert report["imported"] == 200
+    assert max(ahead) <= 2 * 2 # Не больше окна пула, а не весь файл